@@ -1,8 +1,32 @@
+import multiprocessing
+import threading
 from funcs import *
 
+# NumPy is optional. Without it, runs of frames are found in pure Python.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # Constant indicating if the dot separated names (i.e. hello.world.001.jpg) should be condensed or not
 CONDENSE_DOT_SEPARATED = True
 
+# Lists with fewer entries than this are always collapsed on a single core. Collapsing takes about 2.4 microseconds per
+# entry, sending the entries to the workers and the results back about 0.35, and starting the pool about 0.16 seconds
+# the first time, so with two cores the pool only pays off from roughly 200000 entries.
+PARALLEL_THRESHOLD = 200000
+
+# Number of entries given to each worker process at a time when collapsing in parallel
+PARALLEL_CHUNK_SIZE = 50000
+
+# Lists with at least this many entries find their runs of frames with NumPy, when it is installed
+NUMPY_THRESHOLD = 1000
+
+# The pool of worker processes, which is made the first time a list is collapsed in parallel and then kept
+_pool = None
+_pool_processes = None
+_pool_lock = threading.Lock()
+
 class Collapser:
     """
     This class handles all of the collapsing that needs to be done with files. It does all name manipulation and
@@ -14,15 +38,27 @@ class Collapser:
 
     # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
 
-    def __init__(self):
+    def __init__(self, processes=None):
         """
         Constructor creates the necessary lists
+        :param processes: number of worker processes used for large lists. None uses one per CPU, and 1 always
+        collapses on a single core.
         """
         self.res = []
         self.condensed = []
+        self.processes = processes
 
     # GETTERS & SETTERS ------------------------------------------------------------------------------------------------
 
+    def get_process_count(self):
+        """
+        This method gets the number of worker processes large lists are collapsed on.
+        :return: the number of processes, where 1 means collapsing on a single core
+        """
+        if self.processes is None:
+            return multiprocessing.cpu_count()
+        return self.processes
+
     def get_result_files(self):
         """
         This method gets the list of result files stored in the file browser.
@@ -42,8 +78,9 @@ class Collapser:
 
     def make_final_list(self, entries):
         """
-        This hefty method creates the final list of files, which includes the condensed versions of files. The bulk of
-        the logic handles when something should be collapsed.
+        This method creates the final list of files, which includes the condensed versions of files. Lists with at
+        least PARALLEL_THRESHOLD entries are split into chunks and collapsed on a pool of worker processes, which gives
+        exactly the same result as collapsing them on a single core.
         :param entries: The list of files to potentially condense
         :return: The final list of files that include condensed file names
         """
@@ -51,12 +88,122 @@ class Collapser:
         clear_list(self.res)
         clear_list(self.condensed)
 
+        if self.get_process_count() <= 1 or len(entries) < PARALLEL_THRESHOLD:
+            Collapser.collapse_entries(entries, self.res, self.condensed)
+        else:
+            self.collapse_in_parallel(entries)
+
+    def collapse_in_parallel(self, entries):
+        """
+        This method collapses the entries in chunks on the pool of worker processes and then joins the results of the
+        chunks back together. A sequence can be split across two chunks, so when the entries on either side of a split
+        would have been condensed together, the last result of one chunk and the first result of the next are merged.
+        :param entries: The list of files to potentially condense
+        """
+        splits = list(range(0, len(entries), PARALLEL_CHUNK_SIZE))
+        chunks = [entries[split:split + PARALLEL_CHUNK_SIZE] for split in splits]
+        results = get_pool(self.get_process_count()).map(collapse_chunk, chunks)
+
+        for i in range(0, len(results)):
+            chunk_res, chunk_condensed = results[i]
+            if i > 0 and Collapser.is_split_sequence(entries[splits[i] - 1], entries[splits[i]]):
+                # the name and start come from the earlier chunk, and the extension and end come from the later one
+                last = Collapser.parse_condensed(self.res[len(self.res) - 1])
+                first = Collapser.parse_condensed(chunk_res[0])
+                self.res[len(self.res) - 1] = Collapser.get_condensed_filename(last[0], last[1], first[2], last[3],
+                                                                               first[4])
+                chunk_res = chunk_res[1:]
+                chunk_condensed = chunk_condensed[1:]
+            self.res.extend(chunk_res)
+            self.condensed.extend(chunk_condensed)
+
+    @staticmethod
+    def collapse_entries_numpy(entries, res, condensed):
+        """
+        This method gives the same results as collapse_entries, but finds the runs of frames with NumPy instead of
+        comparing each entry to the next one in Python. Each entry is parsed once into a sequence id (the name, frame
+        padding and extension) and a frame number, and a run continues wherever the next entry has the same sequence
+        id and a frame number one higher.
+        :param entries: The list of files to potentially condense
+        :param res: list the final file names are added to
+        :param condensed: list the booleans indicating if each final file was collapsed are added to
+        """
+        sequence_ids = {}
+        sequences = []
+        ids = []
+        frames = []
+        for entry in entries:
+            if Collapser.should_condense(entry):
+                file_parts = entry.split('.')
+                sequence = (Collapser.get_name(file_parts), Collapser.get_buffer(file_parts),
+                            file_parts[len(file_parts) - 1])
+                if sequence not in sequence_ids:
+                    sequence_ids[sequence] = len(sequences)
+                    sequences.append(sequence)
+                ids.append(sequence_ids[sequence])
+                frames.append(Collapser.get_iteration(file_parts))
+            else:
+                # -1 marks an entry that can't be condensed, so it never continues a run
+                ids.append(-1)
+                frames.append(0)
+
+        ids = numpy.array(ids, dtype=numpy.int64)
+        frames = numpy.array(frames, dtype=numpy.int64)
+        can_condense = ids >= 0
+        # continues[i] is True when entry i + 1 condenses up into entry i
+        continues = can_condense[:-1] & (ids[1:] == ids[:-1]) & (numpy.diff(frames) == 1)
+        # every final file starts where the previous entry does not continue into it, and ends where it does not
+        # continue into the next entry
+        starts = numpy.nonzero(numpy.concatenate(([True], ~continues)))[0].tolist()
+        ends = numpy.nonzero(numpy.concatenate((~continues, [True])))[0].tolist()
+
+        for i in range(0, len(starts)):
+            start = starts[i]
+            if ids[start] < 0:
+                res.append(entries[start])
+                condensed.append(False)
+            else:
+                name, frame_padding, ext = sequences[ids[start]]
+                res.append(Collapser.get_condensed_filename(name, frame_padding, ext, int(frames[start]),
+                                                            int(frames[ends[i]])))
+                condensed.append(True)
+
+    @staticmethod
+    def is_split_sequence(last_entry, first_entry):
+        """
+        This method checks if two neighbouring entries that ended up in different chunks would have been condensed
+        together.
+        :param last_entry: last entry of a chunk
+        :param first_entry: first entry of the next chunk
+        :return: if the results of the two chunks need to be merged
+        """
+        if not Collapser.should_condense(last_entry) or not Collapser.should_condense(first_entry):
+            return False
+        return Collapser.should_condense_up(last_entry.split('.'), first_entry.split('.'))
+
+    @staticmethod
+    def collapse_entries(entries, res, condensed):
+        """
+        This hefty method does the collapsing for make_final_list. The bulk of the logic handles when something should
+        be collapsed. The results are added to the lists that are passed in.
+        :param entries: The list of files to potentially condense
+        :param res: list the final file names are added to
+        :param condensed: list the booleans indicating if each final file was collapsed are added to
+        """
+        if numpy is not None and len(entries) >= NUMPY_THRESHOLD:
+            try:
+                Collapser.collapse_entries_numpy(entries, res, condensed)
+                return
+            except OverflowError:
+                # a frame number too large for a 64 bit integer, which only the pure Python path can handle
+                pass
+
         # All initial variables
         name = ""
         frame_padding = 0
         start_range = 0
         end_range = 0
-        should_update_vals = False                  # Variable indicates if the various values should be updated or not
+        should_update_vals = True                   # Variable indicates if the various values should be updated or not
 
         for i in range(0, len(entries)):
             # if the entry can be condensed, look forward in the list
@@ -66,34 +213,76 @@ class Collapser:
                 file_parts = entries[i].split('.')
 
                 # Set the initial values if there are none set already, or sets them if the variable indicates to
-                if i == 0 or should_update_vals:
+                if should_update_vals:
                     name = Collapser.get_name(file_parts)
                     frame_padding = Collapser.get_buffer(file_parts)
                     start_range = Collapser.get_iteration(file_parts)
-                    end_range = Collapser.get_iteration(file_parts)
                     should_update_vals = False      # Updates this so no unecessary changes are made
+                end_range = Collapser.get_iteration(file_parts)
 
                 # if it's not the last entry in the list
                 if Collapser.is_not_last(i, entries):
                     next_file = entries[i + 1].split('.')
-                    end_range = Collapser.get_iteration(file_parts)
                     # if the next file should not be condensed up into the current one
-                    if not Collapser.should_condense_up(file_parts, next_file):
+                    if not Collapser.should_condense(entries[i + 1]) or \
+                            not Collapser.should_condense_up(file_parts, next_file):
                         should_update_vals = True
                         ext = file_parts[len(file_parts) - 1]
-                        self.res.append(Collapser.get_condensed_filename(name, frame_padding, ext, start_range, end_range))
-                        self.condensed.append(True)
+                        res.append(Collapser.get_condensed_filename(name, frame_padding, ext, start_range, end_range))
+                        condensed.append(True)
                 # if it is the last file on the list
                 else:
                     ext = file_parts[len(file_parts) - 1]
-                    self.res.append(Collapser.get_condensed_filename(name, frame_padding, ext, start_range, end_range))
-                    self.condensed.append(True)
+                    res.append(Collapser.get_condensed_filename(name, frame_padding, ext, start_range, end_range))
+                    condensed.append(True)
 
             # if the entry can't be condensed, then add it to the result list
             # and continue looking
             else:
-                self.res.append(entries[i])
-                self.condensed.append(False)
+                res.append(entries[i])
+                condensed.append(False)
+
+    def get_sequence_ranges(self):
+        """
+        This method groups the collapsed results by sequence. Each sequence is identified by its base name, frame
+        padding and extension, and maps to the sorted list of (start, end) frame ranges found for it. Files that were
+        not collapsed are left out.
+        :return: Dictionary of sequence to list of ranges
+        """
+        return Collapser.group_sequence_ranges(self.res, self.condensed)
+
+    @staticmethod
+    def group_sequence_ranges(names, collapsed):
+        """
+        This method does the grouping for get_sequence_ranges on any list of results, such as one stored in a scan.
+        :param names: the final list of names made by the collapser
+        :param collapsed: booleans indicating which of those names were collapsed
+        :return: Dictionary of sequence to list of ranges
+        """
+        sequences = {}
+        for i in range(0, len(names)):
+            if collapsed[i]:
+                basename, frame_padding, ext, start, end = Collapser.parse_condensed(names[i])
+                sequences.setdefault((basename, frame_padding, ext), []).append((start, end))
+        for ranges in sequences.values():
+            ranges.sort()
+        return sequences
+
+    @staticmethod
+    def parse_condensed(condensed_name):
+        """
+        This method splits a condensed name back into the pieces it was made from, so that
+        parse_condensed(get_condensed_filename(...)) gives back the same pieces.
+        Structure: [baseName].%[frame_padding].[extension] [startFrame]-[endFrame]
+        :param condensed_name: name of the condensed file
+        :return: tuple of (basename, frame_padding, extension, start, end)
+        """
+        filename, iter_range = condensed_name.rsplit(" ", 1)
+        # the first character is skipped so a negative start frame is not split on
+        dash = iter_range.index("-", 1)
+        file_parts = filename.rsplit(".", 2)
+        return (file_parts[0], Collapser.get_frame_padding(filename), file_parts[2],
+                int(iter_range[:dash]), int(iter_range[dash + 1:]))
 
     @staticmethod
     def should_condense(filename):
@@ -117,8 +306,9 @@ class Collapser:
             return False
 
         # since the check for condensing dot separated is already done, this
-        # will always be the final indicator for if a file should be condensed
-        if is_num(file_parts[len(file_parts)-2]):
+        # will always be the final indicator for if a file should be condensed.
+        # Only whole numbers are frames, so names like a.inf.exr or a.1e3.exr are not.
+        if is_int(file_parts[len(file_parts)-2]):
             return True
 
     @staticmethod
@@ -207,8 +397,8 @@ class Collapser:
     @staticmethod
     def should_condense_up(current_entry, next_entry):
         """
-        This method decides if the next entry can be condensed up into the existing one. The name needs to be the same
-        and the number needs to be one higher than the previous
+        This method decides if the next entry can be condensed up into the existing one. The name, frame padding and
+        extension need to be the same and the number needs to be one higher than the previous
         :param current_entry: current file name
         :param next_entry: next file name
         :return: if the next file can be collapsed up into the current one
@@ -216,6 +406,11 @@ class Collapser:
         # if names aren't the same, return false
         if Collapser.get_name(current_entry) != Collapser.get_name(next_entry):
             return False
+        # a different padding or extension is a different sequence
+        if Collapser.get_buffer(current_entry) != Collapser.get_buffer(next_entry):
+            return False
+        if current_entry[len(current_entry) - 1] != next_entry[len(next_entry) - 1]:
+            return False
         # If the next file is one "higher", it can be condensed up
         file_count_1 = Collapser.get_iteration(current_entry)
         file_count_2 = Collapser.get_iteration(next_entry)
@@ -286,4 +481,37 @@ class Collapser:
         :param file_parts: the file pre-split along the "."
         :return: the integer associated with this specific iteration
         """
-        return int(file_parts[len(file_parts) - 2])
\ No newline at end of file
+        return int(file_parts[len(file_parts) - 2])
+
+
+def collapse_chunk(entries):
+    """
+    Collapses one chunk of entries on a worker process. This needs to be a module level function so that the process
+    pool can find it.
+    :param entries: The list of files to potentially condense
+    :return: tuple of the final file names and the booleans indicating if each was collapsed
+    """
+    res = []
+    condensed = []
+    Collapser.collapse_entries(entries, res, condensed)
+    return res, condensed
+
+
+def get_pool(processes):
+    """
+    Gets the pool of worker processes, making it the first time it is needed or when a different number of processes
+    is asked for. The workers are started with forkserver, or spawn where that isn't available, rather than forked, so
+    they don't copy the threads and Qt state of the application.
+    :param processes: number of worker processes
+    :return: the multiprocessing pool
+    """
+    global _pool, _pool_processes
+    with _pool_lock:
+        if _pool is None or _pool_processes != processes:
+            if _pool is not None:
+                _pool.close()
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool = context.Pool(processes)
+            _pool_processes = processes
+        return _pool
@@ -0,0 +1,197 @@
+"""
+Finds frames of a sequence that are byte for byte identical to the frame before them, which is what held frames and
+failed renders usually look like. Frames are hashed on a pool of worker threads, and the hashes are cached by path,
+size and modification time so checking a sequence again only hashes the frames that changed.
+"""
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+from collapser import Collapser
+
+# Number of frames hashed at the same time
+HASH_WORKERS = 4
+# Number of bytes read from a frame at a time while hashing it
+READ_SIZE = 4 * 1024 * 1024
+# Maximum number of hashes kept in the cache, which keeps the saved cache to a few megabytes
+CACHE_ENTRIES = 20000
+
+# Each worker thread keeps its own read buffer
+_local = threading.local()
+
+
+def get_read_buffer():
+    """
+    Gets the read buffer of the current thread, making it the first time the thread hashes a file.
+    :return: bytearray of READ_SIZE bytes
+    """
+    buffer = getattr(_local, "buffer", None)
+    if buffer is None:
+        buffer = bytearray(READ_SIZE)
+        _local.buffer = buffer
+    return buffer
+
+
+def hash_file(path):
+    """
+    Hashes the contents of a file with BLAKE2, reading it in large blocks into the buffer of the current thread.
+    :param path: full path of the file
+    :return: hex digest of the contents
+    """
+    digest = hashlib.blake2b()
+    buffer = get_read_buffer()
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+    return digest.hexdigest()
+
+
+class HashCache:
+    """
+    This class caches the hashes of files. A cached hash is only used while the size and modification time of the file
+    are the same as when it was hashed. Once a check is over and the cache holds more than max_entries hashes, the
+    least recently used ones are thrown away, but never the hashes of the check itself. The cache is safe to use from several threads and can be saved to a file so it lasts between sessions.
+    """
+
+    # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        """
+        Constructor creates the empty cache.
+        :param max_entries: maximum number of hashes kept
+        """
+        self.max_entries = max_entries
+        self.hashes = OrderedDict()
+        self.changed = False
+        self.lock = threading.Lock()
+
+    # METHODS ----------------------------------------------------------------------------------------------------------
+
+    def get_digest(self, path):
+        """
+        Gets the hash of a file, hashing it only if it is not cached or has changed since it was cached.
+        :param path: full path of the file
+        :return: hex digest of the contents, or None if the file can't be read
+        """
+        try:
+            stat = os.stat(path)
+            with self.lock:
+                cached = self.hashes.get(path)
+                if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime:
+                    # moves the hash to the end so it is the last to be thrown away
+                    self.hashes.move_to_end(path)
+                    return cached[2]
+            digest = hash_file(path)
+        except (IOError, OSError):
+            return None
+        with self.lock:
+            self.hashes[path] = (stat.st_size, stat.st_mtime, digest)
+            self.hashes.move_to_end(path)
+            self.changed = True
+        return digest
+
+    def trim(self, keep=0):
+        """
+        Throws away the least recently used hashes while there are more than max_entries. This is done once a check
+        is over rather than while hashing, so a check larger than max_entries doesn't throw away its own early frames.
+        :param keep: number of most recently used hashes that are always kept, such as those of the last check
+        """
+        with self.lock:
+            while len(self.hashes) > max(self.max_entries, keep):
+                self.hashes.popitem(last=False)
+
+    def load(self, filename):
+        """
+        Adds the hashes saved in a file to the cache, leaving out files that no longer exist. A missing or unreadable
+        file is ignored. This checks every saved path, so it should be run off the GUI thread.
+        :param filename: full path of the saved cache
+        """
+        try:
+            with open(filename) as f:
+                saved = json.load(f)
+        except (IOError, OSError, ValueError):
+            return
+        # the file keeps the least recently used hashes first, so they are also the first to be thrown away here
+        saved = [(path, tuple(entry)) for path, entry in saved.items() if os.path.exists(path)]
+        with self.lock:
+            loaded = OrderedDict(saved)
+            loaded.update(self.hashes)
+            self.hashes = loaded
+        self.trim()
+
+    def save(self, filename):
+        """
+        Saves the cache to a file, if any hash was added since it was last saved. The file is written next to the old
+        one and then moved over it, so a failed save never leaves a broken cache.
+        :param filename: full path to save the cache to
+        """
+        with self.lock:
+            if not self.changed:
+                return
+            saved = OrderedDict(self.hashes)
+        temp_name = filename + ".tmp"
+        with open(temp_name, "w") as f:
+            json.dump(saved, f)
+        os.replace(temp_name, filename)
+        with self.lock:
+            self.changed = False
+
+
+def find_duplicate_runs(directory, sequence, ranges, cache, pool):
+    """
+    Finds the runs of frames in a sequence where every frame is identical to the frame before it. Only frames next to
+    each other are compared, so a missing frame ends a run.
+    :param directory: full path of the directory holding the sequence
+    :param sequence: tuple of (basename, frame_padding, extension)
+    :param ranges: sorted list of (start, end) frame ranges to check
+    :param cache: HashCache to get the hashes from
+    :param pool: ThreadPool to hash the frames on
+    :return: sorted list of (start, end) ranges of identical frames, each at least two frames long
+    """
+    basename, frame_padding, ext = sequence
+    runs = []
+    for start, end in ranges:
+        paths = [directory + "/" + basename + "." + Collapser.make_padding(frame, frame_padding) + "." + ext
+                 for frame in range(start, end + 1)]
+        run_start = start
+        previous = None
+        # imap keeps the frames in order while they are hashed in parallel
+        for frame, digest in zip(range(start, end + 1), pool.imap(cache.get_digest, paths, 16)):
+            if digest is None or digest != previous:
+                if frame - 1 > run_start:
+                    runs.append((run_start, frame - 1))
+                run_start = frame
+            previous = digest
+        if end > run_start and previous is not None:
+            runs.append((run_start, end))
+    return runs
+
+
+def find_selection_duplicates(directory, selection, cache, workers=HASH_WORKERS):
+    """
+    Finds the runs of identical frames in every selected sequence.
+    :param directory: full path of the directory the selection was made in
+    :param selection: Selection holding the sequences to check
+    :param cache: HashCache to get the hashes from
+    :param workers: number of frames hashed at the same time
+    :return: Dictionary of sequence to the list of ranges of identical frames, only for sequences that have any
+    """
+    duplicates = {}
+    pool = ThreadPool(workers)
+    try:
+        for sequence, ranges in sorted(selection.get_sequence_ranges().items()):
+            runs = find_duplicate_runs(directory, sequence, ranges, cache, pool)
+            if runs:
+                duplicates[sequence] = runs
+    finally:
+        pool.close()
+        pool.join()
+    # the hashes of this check are the most recently used, so they are kept even if there are more than the cap
+    cache.trim(selection.count_frames())
+    return duplicates
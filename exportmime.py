@@ -0,0 +1,188 @@
+"""
+Exports selections out of the file selector by drag and drop or through the clipboard. The exported data holds the
+condensed names of the selection, and the full list of file URLs is only made if the application receiving the data asks
+for it, so dragging a huge sequence doesn't list every frame up front.
+"""
+from PySide2 import QtCore, QtGui
+from PySide2.QtWidgets import QApplication
+from collapser import Collapser
+
+# Mime type holding the condensed names, for tools that understand them
+SPEC_MIME = "application/x-file-selector-specs"
+PLAIN_MIME = "text/plain"
+URI_MIME = "text/uri-list"
+
+
+class SelectionMimeData(QtCore.QMimeData):
+    """
+    This class is the data that is dragged or copied. Plain text and SPEC_MIME hold one full path per line, with
+    sequences written as condensed names. text/uri-list holds a URL for every file and every frame, and is only made
+    the first time it is asked for.
+    """
+
+    # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
+
+    def __init__(self, directory, names):
+        """
+        Constructor stores what is being exported.
+        :param directory: full path of the directory the names are in
+        :param names: list of (name, is_collapsed) tuples
+        """
+        super(SelectionMimeData, self).__init__()
+        self.directory = directory
+        self.names = names
+        self.uri_list = None
+
+    # METHODS ----------------------------------------------------------------------------------------------------------
+
+    def formats(self):
+        """
+        Lists the formats the data can be given in.
+        :return: list of mime types
+        """
+        return [SPEC_MIME, PLAIN_MIME, URI_MIME]
+
+    def hasFormat(self, mime_type):
+        """
+        Indicates if the data can be given in a format.
+        :param mime_type: the mime type asked for
+        :return: if the format is available
+        """
+        return mime_type in self.formats()
+
+    def get_specs(self):
+        """
+        Makes the condensed names as full paths, one per line.
+        :return: the text
+        """
+        return "\n".join([self.directory + "/" + name for name, is_collapsed in self.names])
+
+    @staticmethod
+    def get_frame_names(condensed_name):
+        """
+        Makes the name of every frame of a sequence from its condensed name. parse_condensed is used so names with
+        spaces and negative frame ranges are read correctly.
+        :param condensed_name: collapsed name of the sequence
+        :return: list of the frame names
+        """
+        basename, frame_padding, ext, start, end = Collapser.parse_condensed(condensed_name)
+        return [basename + "." + Collapser.make_padding(frame, frame_padding) + "." + ext
+                for frame in range(start, end + 1)]
+
+    def get_uri_list(self):
+        """
+        Makes the URL of every file and every frame of the sequences, one per line. This is only done once.
+        :return: the uri list as bytes
+        """
+        if self.uri_list is None:
+            lines = []
+            for name, is_collapsed in self.names:
+                files = SelectionMimeData.get_frame_names(name) if is_collapsed else [name]
+                for file in files:
+                    url = QtCore.QUrl.fromLocalFile(self.directory + "/" + file)
+                    lines.append(url.toEncoded().data().decode("ascii"))
+            self.uri_list = ("\r\n".join(lines) + "\r\n").encode("ascii")
+        return self.uri_list
+
+    def retrieveData(self, mime_type, preferred_type):
+        """
+        Gives the data in a format. Qt calls this only when the receiving application asks for that format.
+        :param mime_type: the mime type asked for
+        :param preferred_type: the type Qt would like the data in
+        :return: the data
+        """
+        if mime_type == URI_MIME:
+            return QtCore.QByteArray(self.get_uri_list())
+        if mime_type == PLAIN_MIME:
+            return self.get_specs()
+        if mime_type == SPEC_MIME:
+            return QtCore.QByteArray(self.get_specs().encode("utf-8"))
+        return super(SelectionMimeData, self).retrieveData(mime_type, preferred_type)
+
+
+def copy_to_clipboard(directory, names):
+    """
+    Puts an export of the names on the clipboard.
+    :param directory: full path of the directory the names are in
+    :param names: list of (name, is_collapsed) tuples
+    """
+    QApplication.clipboard().setMimeData(SelectionMimeData(directory, names))
+
+
+class DragStarter(QtCore.QObject):
+    """
+    This class starts a drag from a tree widget when the mouse is pressed on an item and moved far enough. It is
+    installed as an event filter on the tree's viewport, so the generated UI doesn't need a tree subclass.
+
+    In multi selection mode a press toggles the item under the mouse, which would drop a selected item from the drag
+    that starts from it. A press on a selected item is therefore held back, and only given to the tree when the mouse
+    is released without a drag, so a click still toggles the item.
+    """
+
+    # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
+
+    def __init__(self, tree, get_export):
+        """
+        Constructor installs the filter on the tree.
+        :param tree: the QTreeWidget to drag from
+        :param get_export: function returning a tuple of the directory and the list of (name, is_collapsed) tuples to
+        drag
+        """
+        super(DragStarter, self).__init__(tree)
+        self.tree = tree
+        self.get_export = get_export
+        self.press_pos = None
+        self.held_press = None
+        self.replaying = False
+        tree.viewport().installEventFilter(self)
+
+    # METHODS ----------------------------------------------------------------------------------------------------------
+
+    def eventFilter(self, obj, event):
+        """
+        Watches mouse presses and moves on the viewport and starts a drag when needed.
+        :param obj: the viewport
+        :param event: Event Type
+        :return: True if the event was held back or started a drag
+        """
+        if event.type() == QtCore.QEvent.MouseButtonPress and event.button() == QtCore.Qt.LeftButton:
+            item = self.tree.itemAt(event.pos())
+            self.press_pos = event.pos() if item is not None else None
+            self.held_press = None
+            if item is not None and item.isSelected() and event.modifiers() == QtCore.Qt.NoModifier and \
+                    not self.replaying:
+                # a copy is kept since Qt reuses the event object once the filter returns
+                self.held_press = QtGui.QMouseEvent(event.type(), event.localPos(), event.windowPos(),
+                                                    event.screenPos(), event.button(), event.buttons(),
+                                                    event.modifiers())
+                return True
+        elif event.type() == QtCore.QEvent.MouseButtonRelease:
+            held_press = self.held_press
+            clicked = self.press_pos is not None
+            self.press_pos = None
+            self.held_press = None
+            if held_press is not None:
+                if not clicked:
+                    # the mouse moved too far for a click, and the tree must not see a release without a press
+                    return True
+                # no drag started, so the press is handled as a normal click after all
+                self.replaying = True
+                try:
+                    QApplication.sendEvent(obj, held_press)
+                finally:
+                    self.replaying = False
+        elif event.type() == QtCore.QEvent.MouseMove and int(event.buttons()) & int(QtCore.Qt.LeftButton):
+            if self.press_pos is not None and \
+                    (event.pos() - self.press_pos).manhattanLength() >= QApplication.startDragDistance():
+                self.press_pos = None
+                directory, names = self.get_export()
+                if names:
+                    self.held_press = None
+                    drag = QtGui.QDrag(self.tree)
+                    drag.setMimeData(SelectionMimeData(directory, names))
+                    drag.exec_(QtCore.Qt.CopyAction)
+                    return True
+            if self.held_press is not None:
+                # the tree would drag select from a press it never saw
+                return True
+        return super(DragStarter, self).eventFilter(obj, event)
@@ -20,9 +20,11 @@ class FileBrowser:
 
     def get_files(self):
         """
-        Method to get the files stored in self.files
+        Method to get the files stored in self.files. The current directory is listed again if no listing is stored.
         :return: list of files in current directory
         """
+        if self.files is None:
+            return self.get_files_in_dir()
         return self.files
 
     def get_current_path(self):
@@ -58,14 +60,18 @@ class FileBrowser:
         is stored in self.current_path.
         :return: The list of file names in the current directory
         """
-        all_files = os.listdir(self.current_path)
-        self.files = []
-        for file in all_files:
-            if not FileBrowser.is_hidden_file(file):
-                self.files.append(file)
-        self.files.sort()
+        self.files = FileBrowser.list_visible_files(self.current_path)
         return self.files
 
+    def set_files(self, files):
+        """
+        Stores a listing of the current directory that was made elsewhere (for example by the prefetcher), so the
+        directory does not need to be listed again.
+        :param files: sorted list of visible file names in the current directory, or None to list the directory the
+        next time the files are asked for
+        """
+        self.files = files
+
     def get_parent_path(self):
         """
         This function gets the parent path of the current path. It does not
@@ -74,6 +80,21 @@ class FileBrowser:
         """
         return os.path.abspath(os.path.join(self.current_path, os.pardir))
 
+    @staticmethod
+    def list_visible_files(path):
+        """
+        Lists the files in the given directory, leaving out hidden files. This does not touch the state of any file
+        browser, so it is safe to call from a background thread.
+        :param path: full path of the directory to list
+        :return: The sorted list of visible file names in the directory
+        """
+        files = []
+        for file in os.listdir(path):
+            if not FileBrowser.is_hidden_file(file):
+                files.append(file)
+        files.sort()
+        return files
+
     @staticmethod
     def is_hidden_file(name):
         """
@@ -0,0 +1,421 @@
+"""
+A flipbook for playing back collapsed image sequences inside the file selector. Upcoming frames are decoded on a pool of
+worker threads into a cache that is bounded by memory, and the number of frames read ahead adapts to how long frames
+take to decode. Every open flipbook shares the same worker threads and memory budget. The flipbook reports its cache hit
+rate, the number of frames dropped during playback and the number of frames that weren't ready when scrubbed to.
+"""
+import math
+import time
+import itertools
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+from PySide2 import QtCore, QtGui, QtWidgets
+from collapser import Collapser
+
+# Frames per second the flipbook plays at
+DEFAULT_FPS = 24
+# Number of frames decoded at the same time, for all flipbooks together
+DECODE_WORKERS = 4
+# Maximum number of bytes of decoded frames kept in memory, for all flipbooks together
+CACHE_BYTES = 512 * 1024 * 1024
+# The fewest and most frames read ahead of the current frame
+MIN_READ_AHEAD = 2
+MAX_READ_AHEAD = 64
+
+
+class FrameCache:
+    """
+    This class keeps decoded frames, throwing away the least recently used ones once the frames use more than the
+    memory budget. One cache is shared by every flipbook window, so frames are keyed by the loader that decoded them
+    and their index. It is only used from the GUI thread.
+    """
+
+    # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
+
+    def __init__(self, max_bytes=CACHE_BYTES):
+        """
+        Constructor creates the empty cache.
+        :param max_bytes: maximum number of bytes of frames kept
+        """
+        self.max_bytes = max_bytes
+        self.frames = OrderedDict()
+        self.bytes = 0
+        self.users = 0
+
+    # GETTERS & SETTERS ------------------------------------------------------------------------------------------------
+
+    def get_average_bytes(self):
+        """
+        This method gets the average size of the cached frames.
+        :return: number of bytes, or 0 when the cache is empty
+        """
+        return self.bytes // len(self.frames) if self.frames else 0
+
+    def get_share(self):
+        """
+        This method gets the part of the budget each loader using the cache can count on.
+        :return: number of bytes
+        """
+        return self.max_bytes // max(self.users, 1)
+
+    # METHODS ----------------------------------------------------------------------------------------------------------
+
+    def contains(self, key):
+        """
+        Indicates if a frame is cached.
+        :param key: tuple of the loader's key and the index of the frame
+        :return: if the frame is cached
+        """
+        return key in self.frames
+
+    def get(self, key):
+        """
+        Gets a cached frame and marks it as the most recently used.
+        :param key: tuple of the loader's key and the index of the frame
+        :return: the QImage, or None if it isn't cached
+        """
+        image = self.frames.pop(key, None)
+        if image is not None:
+            self.frames[key] = image
+        return image
+
+    def put(self, key, image):
+        """
+        Adds a decoded frame and throws away the least recently used frames while over the budget.
+        :param key: tuple of the loader's key and the index of the frame
+        :param image: the decoded QImage
+        """
+        if key in self.frames:
+            self.bytes -= self.frames.pop(key).sizeInBytes()
+        self.frames[key] = image
+        self.bytes += image.sizeInBytes()
+        while self.bytes > self.max_bytes and len(self.frames) > 1:
+            self.bytes -= self.frames.popitem(last=False)[1].sizeInBytes()
+
+    def remove_all(self, owner):
+        """
+        Throws away every frame of a loader.
+        :param owner: the loader's key
+        """
+        for key in [key for key in self.frames if key[0] == owner]:
+            self.bytes -= self.frames.pop(key).sizeInBytes()
+
+
+# The frame cache and decode pool shared by every flipbook window, made when the first window opens
+_shared_cache = None
+_shared_pool = None
+# Numbers the loaders so their frames can be told apart in the shared cache
+_loader_count = itertools.count()
+
+
+def get_shared_cache():
+    """
+    Gets the frame cache shared by every flipbook window.
+    :return: the FrameCache
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = FrameCache(CACHE_BYTES)
+    return _shared_cache
+
+
+def get_shared_pool():
+    """
+    Gets the decode pool shared by every flipbook window.
+    :return: the ThreadPool
+    """
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = ThreadPool(DECODE_WORKERS)
+    return _shared_pool
+
+
+class ReadAheadLoader(QtCore.QObject):
+    """
+    This class decodes the frames after the current one on the shared pool of worker threads. The number of frames read
+    ahead is worked out from the average decode time, so slow frames are read further ahead, and is limited by this
+    loader's share of the shared cache. Frames that are no longer needed by the time a worker gets to them are skipped.
+    """
+
+    # Emitted from a worker thread with the frame index, the decoded QImage (None if skipped) and the decode seconds
+    decoded = QtCore.Signal(int, object, float)
+    # Emitted on the GUI thread once a frame is in the cache
+    frame_ready = QtCore.Signal(int)
+
+    # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
+
+    def __init__(self, get_path, frame_count, fps=DEFAULT_FPS, cache=None, pool=None, workers=DECODE_WORKERS):
+        """
+        Constructor joins the shared cache and pool.
+        :param get_path: function giving the full path of the frame at an index
+        :param frame_count: number of frames in the sequence
+        :param fps: frames per second of playback
+        :param cache: FrameCache to keep frames in, the shared cache is used when None
+        :param pool: ThreadPool to decode on, the shared pool is used when None
+        :param workers: number of threads in the pool
+        """
+        super(ReadAheadLoader, self).__init__()
+        self.get_path = get_path
+        self.frame_count = frame_count
+        self.fps = fps
+        self.workers = workers
+        self.cache = cache if cache is not None else get_shared_cache()
+        self.cache.users += 1
+        self.pool = pool if pool is not None else get_shared_pool()
+        self.key = next(_loader_count)
+        self.pending = set()
+        self.decode_time = 0.0
+        self.window = (0, 0)
+        self.hits = 0
+        self.misses = 0
+        self.closed = False
+        self.decoded.connect(self.on_decoded)
+
+    # GETTERS & SETTERS ------------------------------------------------------------------------------------------------
+
+    def get_read_ahead(self):
+        """
+        This method works out how many frames to read ahead. The workers together decode workers / decode_time frames
+        per second, so the slower that is compared to playback, the further ahead frames are read.
+        :return: number of frames to read ahead
+        """
+        depth = MIN_READ_AHEAD + int(math.ceil(2 * self.fps * self.decode_time / self.workers))
+        average_bytes = self.cache.get_average_bytes()
+        if average_bytes:
+            # leaves room for the current frame in this loader's share of the cache
+            depth = min(depth, self.cache.get_share() // average_bytes - 1)
+        return max(MIN_READ_AHEAD, min(depth, MAX_READ_AHEAD))
+
+    def get_hit_rate(self):
+        """
+        This method gets the share of frames asked for that were already decoded.
+        :return: hit rate between 0 and 1
+        """
+        total = self.hits + self.misses
+        return float(self.hits) / total if total else 0.0
+
+    def get_frame(self, index):
+        """
+        This method gets a decoded frame and counts the hit or miss.
+        :param index: index of the frame
+        :return: the QImage, or None if it isn't decoded yet
+        """
+        image = self.cache.get((self.key, index))
+        if image is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return image
+
+    # METHODS ----------------------------------------------------------------------------------------------------------
+
+    def request(self, index):
+        """
+        Asks for a frame and the frames after it to be decoded, wrapping around at the end of the sequence.
+        :param index: index of the current frame
+        """
+        depth = min(self.get_read_ahead(), self.frame_count - 1)
+        self.window = (index, depth)
+        for offset in range(0, depth + 1):
+            ahead = (index + offset) % self.frame_count
+            if not self.cache.contains((self.key, ahead)) and ahead not in self.pending:
+                self.pending.add(ahead)
+                self.pool.apply_async(self.run_decode, (ahead,))
+
+    def is_wanted(self, index):
+        """
+        Indicates if a frame is still in the range of frames being read ahead.
+        :param index: index of the frame
+        :return: if the frame is still needed
+        """
+        current, depth = self.window
+        return (index - current) % self.frame_count <= depth
+
+    def run_decode(self, index):
+        """
+        Decodes a frame on a worker thread. QImage, unlike QPixmap, can be made outside of the GUI thread.
+        :param index: index of the frame
+        """
+        if not self.is_wanted(index):
+            self.decoded.emit(index, None, 0.0)
+            return
+        started = time.perf_counter()
+        image = QtGui.QImage(self.get_path(index))
+        self.decoded.emit(index, image, time.perf_counter() - started)
+
+    def on_decoded(self, index, image, seconds):
+        """
+        Stores a decoded frame in the cache and updates the average decode time.
+        :param index: index of the frame
+        :param image: the decoded QImage, or None if the frame was skipped
+        :param seconds: how long the decode took
+        """
+        self.pending.discard(index)
+        if image is None or self.closed:
+            return
+        # an exponential moving average follows changes in decode speed without jumping on every frame
+        self.decode_time = seconds if not self.decode_time else 0.8 * self.decode_time + 0.2 * seconds
+        self.cache.put((self.key, index), image)
+        self.frame_ready.emit(index)
+
+    def close(self):
+        """
+        Leaves the shared cache, throwing away this loader's frames. Frames still waiting in the pool are skipped.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.window = (0, -1)
+        self.cache.remove_all(self.key)
+        self.cache.users -= 1
+
+
+class FlipbookWindow(QtWidgets.QDialog):
+    """
+    This class is the flipbook window for one collapsed sequence. It has a play button, a scrub slider and a line
+    showing the current frame, the cache hit rate, the number of dropped frames and the number of scrub misses.
+    """
+
+    # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
+
+    def __init__(self, directory, condensed_name, parent=None, fps=DEFAULT_FPS):
+        """
+        Constructor builds the window and starts reading the first frames.
+        :param directory: full path of the directory holding the sequence
+        :param condensed_name: collapsed name of the sequence
+        :param parent: parent widget
+        :param fps: frames per second of playback
+        """
+        super(FlipbookWindow, self).__init__(parent)
+        self.setWindowTitle(condensed_name)
+        self.directory = directory
+        self.basename, self.frame_padding, self.ext, self.start, self.end = Collapser.parse_condensed(condensed_name)
+        self.current = 0
+        self.dropped = 0
+        self.scrub_misses = 0
+
+        self.loader = ReadAheadLoader(self.get_path, self.end - self.start + 1, fps)
+        self.loader.frame_ready.connect(self.on_frame_ready)
+
+        self.image_label = QtWidgets.QLabel(self)
+        self.image_label.setAlignment(QtCore.Qt.AlignCenter)
+        self.image_label.setMinimumSize(640, 360)
+        self.play_button = QtWidgets.QPushButton("Play", self)
+        self.play_button.clicked.connect(self.toggle_play)
+        self.slider = QtWidgets.QSlider(QtCore.Qt.Horizontal, self)
+        self.slider.setRange(0, self.end - self.start)
+        self.slider.valueChanged.connect(self.scrub)
+        self.status_label = QtWidgets.QLabel(self)
+
+        controls = QtWidgets.QHBoxLayout()
+        controls.addWidget(self.play_button)
+        controls.addWidget(self.slider)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(self.image_label)
+        layout.addLayout(controls)
+        layout.addWidget(self.status_label)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.timer.setInterval(int(1000 / fps))
+        self.timer.timeout.connect(self.advance)
+        # finished is emitted however the window is closed, and the window is deleted afterwards so it doesn't stay
+        # behind as a hidden child of its parent
+        self.finished.connect(self.stop)
+        self.finished.connect(self.deleteLater)
+
+        self.show_frame(0)
+
+    # METHODS ----------------------------------------------------------------------------------------------------------
+
+    def get_path(self, index):
+        """
+        Gets the full path of a frame without expanding the whole sequence.
+        :param index: index of the frame in the sequence
+        :return: full path of the frame
+        """
+        frame = Collapser.make_padding(self.start + index, self.frame_padding)
+        return self.directory + "/" + self.basename + "." + frame + "." + self.ext
+
+    def toggle_play(self):
+        """
+        Starts or stops playback.
+        """
+        if self.timer.isActive():
+            self.timer.stop()
+            self.play_button.setText("Play")
+        else:
+            self.timer.start()
+            self.play_button.setText("Pause")
+
+    def advance(self):
+        """
+        Moves to the next frame during playback. A frame that isn't decoded yet when it is due is dropped.
+        """
+        index = (self.current + 1) % self.loader.frame_count
+        if not self.show_frame(index):
+            self.dropped += 1
+        self.slider.blockSignals(True)
+        self.slider.setValue(index)
+        self.slider.blockSignals(False)
+
+    def scrub(self, index):
+        """
+        Moves to the frame picked with the slider. A frame that isn't decoded yet is counted as a scrub miss, kept apart
+        from the frames dropped during playback.
+        :param index: index of the frame
+        """
+        if not self.show_frame(index):
+            self.scrub_misses += 1
+            self.update_status()
+
+    def show_frame(self, index):
+        """
+        Makes a frame the current one, shows it if it is decoded and reads ahead from it.
+        :param index: index of the frame
+        :return: if the frame was shown
+        """
+        self.current = index
+        image = self.loader.get_frame(index)
+        self.loader.request(index)
+        if image is not None:
+            self.display(image)
+        self.update_status()
+        return image is not None
+
+    def on_frame_ready(self, index):
+        """
+        Shows the current frame once it has been decoded, for when it wasn't ready when it was asked for.
+        :param index: index of the decoded frame
+        """
+        if index == self.current:
+            self.display(self.loader.cache.get((self.loader.key, index)))
+
+    def display(self, image):
+        """
+        Shows a decoded frame, scaled to fit the window.
+        :param image: the QImage
+        """
+        if image.isNull():
+            self.image_label.setText("Can't read " + self.get_path(self.current))
+            return
+        pixmap = QtGui.QPixmap.fromImage(image)
+        self.image_label.setPixmap(pixmap.scaled(self.image_label.size(), QtCore.Qt.KeepAspectRatio,
+                                                 QtCore.Qt.SmoothTransformation))
+
+    def update_status(self):
+        """
+        Updates the line showing the current frame, cache hit rate, dropped frames, scrub misses and read ahead depth.
+        """
+        self.status_label.setText("Frame " + str(self.start + self.current) +
+                                  "   Cache hit rate " + str(int(round(self.loader.get_hit_rate() * 100))) +
+                                  "%   Dropped " + str(self.dropped) +
+                                  "   Scrub misses " + str(self.scrub_misses) +
+                                  "   Read ahead " + str(self.loader.get_read_ahead()))
+
+    def stop(self):
+        """
+        Stops playback and gives the window's share of the cache back when the window is closed.
+        """
+        self.timer.stop()
+        self.loader.close()
@@ -36,6 +36,17 @@ def is_num(string):
         return False
 
 
+def is_int(string):
+    """
+    Indicates if the given string is a whole number written only with the digits 0 to 9 and an optional leading minus
+    sign. Unlike is_num, strings such as inf, 1e3 and 1.5 are not accepted.
+    :param string: the string to check
+    :return: if the string is a whole number
+    """
+    digits = string[1:] if string.startswith("-") else string
+    return digits != "" and digits.strip("0123456789") == ""
+
+
 def str_to_bool(string):
     """
     Converts a string to a boolean. If the string is True or Yes, then True is returned. False is returned for any other
@@ -47,3 +58,103 @@ def str_to_bool(string):
         return True
     return False
 
+
+def intersect_ranges(ranges1, ranges2):
+    """
+    Finds the frames that are in both lists of ranges. Both lists hold inclusive (start, end) tuples that are sorted
+    and do not overlap, which lets this walk through them once instead of looking at every frame.
+    :param ranges1: first sorted list of ranges
+    :param ranges2: second sorted list of ranges
+    :return: sorted list of ranges covering the frames found in both lists
+    """
+    result = []
+    i = 0
+    j = 0
+    while i < len(ranges1) and j < len(ranges2):
+        start = max(ranges1[i][0], ranges2[j][0])
+        end = min(ranges1[i][1], ranges2[j][1])
+        if start <= end:
+            result.append((start, end))
+        # move past whichever range finishes first
+        if ranges1[i][1] < ranges2[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def subtract_ranges(ranges1, ranges2):
+    """
+    Finds the frames that are in the first list of ranges but not in the second. Both lists hold inclusive
+    (start, end) tuples that are sorted and do not overlap.
+    :param ranges1: sorted list of ranges to take frames away from
+    :param ranges2: sorted list of ranges to take away
+    :return: sorted list of ranges covering the frames only found in ranges1
+    """
+    result = []
+    j = 0
+    for start, end in ranges1:
+        # skip the ranges that finish before this one starts
+        while j < len(ranges2) and ranges2[j][1] < start:
+            j += 1
+        k = j
+        while k < len(ranges2) and ranges2[k][0] <= end:
+            if ranges2[k][0] > start:
+                result.append((start, ranges2[k][0] - 1))
+            start = max(start, ranges2[k][1] + 1)
+            k += 1
+        if start <= end:
+            result.append((start, end))
+    return result
+
+
+def union_ranges(ranges1, ranges2):
+    """
+    Combines two lists of ranges into one. The result is sorted and ranges that overlap or touch are merged together.
+    :param ranges1: first list of ranges
+    :param ranges2: second list of ranges
+    :return: sorted list of ranges covering the frames found in either list
+    """
+    result = []
+    for start, end in sorted(list(ranges1) + list(ranges2)):
+        if result and start <= result[len(result) - 1][1] + 1:
+            if end > result[len(result) - 1][1]:
+                result[len(result) - 1] = (result[len(result) - 1][0], end)
+        else:
+            result.append((start, end))
+    return result
+
+
+def count_frames(ranges):
+    """
+    Counts the number of frames covered by a list of ranges that do not overlap.
+    :param ranges: list of inclusive (start, end) tuples
+    :return: the number of frames
+    """
+    total = 0
+    for start, end in ranges:
+        total += end - start + 1
+    return total
+
+
+def parse_frame_range(string):
+    """
+    Reads a frame range typed by the user, either a single frame (1001) or a start and end frame (1001-1200).
+    :param string: the range to read
+    :return: tuple of (start, end), or None if the string is not a valid range
+    """
+    string = string.strip()
+    # the first character is skipped so a negative start frame is not split on
+    dash = string.find("-", 1)
+    try:
+        if dash < 0:
+            start = int(string)
+            end = start
+        else:
+            start = int(string[:dash])
+            end = int(string[dash + 1:])
+    except ValueError:
+        return None
+    if end < start:
+        return None
+    return start, end
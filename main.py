@@ -1,18 +1,34 @@
 import sys
+import os.path
 from PySide2 import QtWidgets
 from PySide2.QtWidgets import QApplication, QMainWindow
 from PySide2 import QtCore
+from PySide2 import QtGui
 from ui_mainwindow import Ui_MainWindow
 from collapser import Collapser
 from filebrowser import FileBrowser
+from prefetcher import Prefetcher
+from scanservice import get_scan, GUI_TIMEOUT
+from pathcompleter import PathCompleter
+from selection import Selection
+from duplicates import HashCache, find_selection_duplicates
+from exportmime import DragStarter, copy_to_clipboard
+from flipbook import FlipbookWindow
+from multiprocessing.pool import ThreadPool
 from funcs import *
 
+# File the hashes used to find duplicate frames are saved in between sessions
+HASH_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".file_selector_hashes.json")
+
 
 class MainWindow(QMainWindow):
     """
     This class handles all of the UI elements and how they operate and connect to the logical pieces.
     """
 
+    # Emitted from the duplicate check thread with the path that was checked and the duplicate runs found
+    duplicates_found = QtCore.Signal(str, object)
+
     # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
 
     def __init__(self, app):
@@ -23,7 +39,13 @@ class MainWindow(QMainWindow):
         self.app = app
         self.fb = FileBrowser()
         self.collapser = Collapser()
-        self.widgets = []
+        self.prefetcher = Prefetcher(scanner=get_scan)
+        self.selection = Selection()
+        self.frame_picks = Selection()
+        self.hash_cache = HashCache()
+        self.duplicate_pool = ThreadPool(1)
+        # the saved hashes are loaded on the duplicate thread, so they are ready before the first check runs there
+        self.duplicate_pool.apply_async(self.hash_cache.load, (HASH_CACHE_FILE,))
 
         # Sets up UI based on the auto-generated python file
         self.ui.setupUi(self)
@@ -60,13 +82,14 @@ class MainWindow(QMainWindow):
         """
         This method handles everything that goes with changing the file path regardless of which direction the
         movement is happening in. It clears the trees containing the current files so the new ones can be displayed,
-        clears the list of widgets, sets the text in the line edit, logically upadtes the path in the file browser,
-        and lastly updates the visual file browser in the left tree.
+        sets the text in the line edit, logically upadtes the path in the file browser, and lastly updates the visual
+        file browser in the left tree, which also starts a new selection.
         :param new_path: the new path to display
         """
+        self.prefetcher.cancel()
+        self.prefetcher.visit(new_path)
         self.ui.systemTreeWidget.clear()
         self.ui.selectedTreeWidget.clear()
-        clear_list(self.widgets)
         self.ui.pathLineEdit.setText(new_path)
         self.fb.set_current_path(new_path)
         self.populate_system_tree()
@@ -99,6 +122,23 @@ class MainWindow(QMainWindow):
         self.ui.multiCheckBox.setChecked(True)
         # Sets up connection between returnPressed and submitting the path change
         self.ui.pathLineEdit.returnPressed.connect(self.submit_path_change)
+        # Sets up completion of folder names in the path line edit
+        self.path_completer = PathCompleter(self.ui.pathLineEdit, self.fb.get_current_path)
+        # Sets up the right click menu of the left tree, used to select part of a sequence
+        self.ui.systemTreeWidget.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.ui.systemTreeWidget.customContextMenuRequested.connect(self.on_system_context_menu)
+        # Sets up the right click menu of the right tree, used to look for duplicate frames
+        self.ui.selectedTreeWidget.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.ui.selectedTreeWidget.customContextMenuRequested.connect(self.on_selected_context_menu)
+        self.duplicates_found.connect(self.show_duplicates)
+        # Sets up dragging and copying the selection out of both trees
+        self.system_drag = DragStarter(self.ui.systemTreeWidget, self.get_system_export)
+        self.selected_drag = DragStarter(self.ui.selectedTreeWidget, self.get_selected_export)
+        for tree, copy in ((self.ui.systemTreeWidget, self.copy_system_selection),
+                           (self.ui.selectedTreeWidget, self.copy_selected_files)):
+            shortcut = QtWidgets.QShortcut(QtGui.QKeySequence.Copy, tree)
+            shortcut.setContext(QtCore.Qt.WidgetWithChildrenShortcut)
+            shortcut.activated.connect(copy)
 
     def on_double_click(self):
         """
@@ -113,9 +153,14 @@ class MainWindow(QMainWindow):
     def submit_path_change(self):
         """
         Submits the path change if it is made in the QLineEdit. Gets the value in the text edit and passes it into
-        update_path to make all the necessary changes.
-        """
-        path = self.ui.pathLineEdit.text()
+        update_path to make all the necessary changes. Relative paths are resolved against the current path, and paths
+        that aren't folders are reported in the status bar instead.
+        """
+        path = os.path.expanduser(self.ui.pathLineEdit.text())
+        path = os.path.normpath(os.path.join(self.fb.get_current_path(), path))
+        if not os.path.isdir(path):
+            self.ui.statusbar.showMessage("Not a folder: " + path, 5000)
+            return
         self.update_path(path)
 
     def setup_multi_select(self):
@@ -139,26 +184,182 @@ class MainWindow(QMainWindow):
 
     def deselect_all(self):
         """
-        Deselects all files in the lefthand browser and updates the right widget
+        Deselects all files in the lefthand browser, including any frames picked with "Select Frames...", and updates
+        the right widget
         """
         self.ui.systemTreeWidget.clearSelection()
+        self.frame_picks.deselect_all()
         self.update_right_widget()
 
     def update_right_widget(self):
         """
-        This function is called whenever there is a click event registered in the app. To ensure the list isn't being
-        updated unnecessarily, the current widgets are stored and the selected ones are compared to that list. If those
-        lists are different, then the right widget is updated.
-        :return:
+        This function is called whenever there is a click event registered in the app. The items selected in the left
+        tree and the picked frames are turned into a range based selection, which is compared to the current one so
+        the right widget is only updated when the selection has changed. When every item is selected, the selection
+        only records that, without looking at each item.
         """
-        self.widgets.sort()
-        new_widgets = self.ui.systemTreeWidget.selectedItems()
-        new_widgets.sort()
-        if not self.ui.multiCheckBox.isChecked() or not self.widgets == new_widgets:
-            equalize_lists(self.widgets, new_widgets)
+        items = self.ui.systemTreeWidget.selectedItems()
+        new_selection = self.selection.new_selection()
+        if items and len(items) == self.ui.systemTreeWidget.topLevelItemCount():
+            new_selection.select_all()
+        else:
+            for item in items:
+                new_selection.select_name(item.text(0), str_to_bool(item.text(1)))
+        if not self.frame_picks.is_empty():
+            new_selection = new_selection.union(self.frame_picks)
+        if not self.ui.multiCheckBox.isChecked() or not self.selection == new_selection:
+            self.selection = new_selection
             self.populate_selected_tree()
             self.set_expansion()
 
+    def on_system_context_menu(self, pos):
+        """
+        Shows the right click menu of the lefthand file browser. Collapsed items also get a "Select Frames..." option.
+        :param pos: position of the click in the tree
+        """
+        item = self.ui.systemTreeWidget.itemAt(pos)
+        menu = QtWidgets.QMenu(self)
+        copy = menu.addAction("Copy")
+        select_frames = None
+        if item is not None and str_to_bool(item.text(1)):
+            select_frames = menu.addAction("Select Frames...")
+        chosen = menu.exec_(self.ui.systemTreeWidget.viewport().mapToGlobal(pos))
+        if chosen is None:
+            return
+        if chosen == copy:
+            self.copy_system_selection()
+        elif chosen == select_frames:
+            self.select_frames(item.text(0))
+
+    def select_frames(self, condensed_name):
+        """
+        Asks the user for a range of frames and selects only those frames of a collapsed sequence, without expanding
+        it. The range is limited to the frames of the collapsed item.
+        :param condensed_name: collapsed name of the sequence
+        """
+        basename, frame_padding, ext, start, end = Collapser.parse_condensed(condensed_name)
+        text, ok = QtWidgets.QInputDialog.getText(self, "Select Frames",
+                                                  "Frames to select (" + str(start) + "-" + str(end) + "):")
+        if not ok:
+            return
+        frame_range = parse_frame_range(text)
+        if frame_range is None or frame_range[1] < start or frame_range[0] > end:
+            self.ui.statusbar.showMessage("Not a frame range of " + condensed_name + ": " + text, 5000)
+            return
+        self.frame_picks.select_frames((basename, frame_padding, ext), max(frame_range[0], start),
+                                       min(frame_range[1], end))
+        self.update_right_widget()
+
+    def on_selected_context_menu(self, pos):
+        """
+        Shows the right click menu of the righthand file browser.
+        :param pos: position of the click in the tree
+        """
+        item = self.ui.selectedTreeWidget.itemAt(pos)
+        expanded = self.ui.expandCollapseButton.text() == "Collapse Files"
+        menu = QtWidgets.QMenu(self)
+        copy = menu.addAction("Copy")
+        find_duplicates = menu.addAction("Find Duplicate Frames")
+        flipbook = None
+        if item is not None and str_to_bool(item.text(1)) and not expanded:
+            flipbook = menu.addAction("Flipbook")
+        chosen = menu.exec_(self.ui.selectedTreeWidget.viewport().mapToGlobal(pos))
+        if chosen is None:
+            return
+        if chosen == copy:
+            self.copy_selected_files()
+        elif chosen == find_duplicates:
+            self.find_duplicates()
+        elif chosen == flipbook:
+            self.open_flipbook(item.text(0))
+
+    def open_flipbook(self, condensed_name):
+        """
+        Opens a flipbook window playing a collapsed sequence. The window is owned by the main window and deletes itself
+        once it is closed.
+        :param condensed_name: collapsed name of the sequence
+        """
+        window = FlipbookWindow(self.fb.get_current_path(), condensed_name, self)
+        window.show()
+
+    def get_system_export(self):
+        """
+        Gets what is exported from the lefthand file browser, which is the whole selection including picked frames.
+        :return: tuple of the current path and the list of (name, is_collapsed) tuples
+        """
+        # Makes sure the selection matches the tree, since a drag can start before the mouse is released
+        self.update_right_widget()
+        return self.fb.get_current_path(), self.selection.get_condensed_names()
+
+    def get_selected_export(self):
+        """
+        Gets what is exported from the righthand file browser, which is the selected item or every item if none is
+        selected. Expanded items are single files even when they belong to a collapsed sequence.
+        :return: tuple of the current path and the list of (name, is_collapsed) tuples
+        """
+        items = self.ui.selectedTreeWidget.selectedItems()
+        if not items:
+            return self.fb.get_current_path(), self.selection.get_condensed_names()
+        expanded = self.ui.expandCollapseButton.text() == "Collapse Files"
+        return self.fb.get_current_path(), [(item.text(0), str_to_bool(item.text(1)) and not expanded)
+                                            for item in items]
+
+    def copy_system_selection(self):
+        """
+        Copies the selection of the lefthand file browser to the clipboard.
+        """
+        directory, names = self.get_system_export()
+        copy_to_clipboard(directory, names)
+
+    def copy_selected_files(self):
+        """
+        Copies the files of the righthand file browser to the clipboard.
+        """
+        directory, names = self.get_selected_export()
+        copy_to_clipboard(directory, names)
+
+    def find_duplicates(self):
+        """
+        Starts looking for identical consecutive frames in the selected sequences. The frames are hashed in the
+        background and the result is shown by show_duplicates once it is ready.
+        """
+        if not self.selection.get_sequence_ranges():
+            self.ui.statusbar.showMessage("No sequences selected", 5000)
+            return
+        self.ui.statusbar.showMessage("Looking for duplicate frames...")
+        self.duplicate_pool.apply_async(self.run_duplicate_check, (self.fb.get_current_path(), self.selection))
+
+    def run_duplicate_check(self, path, selection):
+        """
+        Looks for duplicate frames on the background thread and saves the hashes for next time.
+        :param path: the path the selection was made in
+        :param selection: the Selection to check
+        """
+        duplicates = find_selection_duplicates(path, selection, self.hash_cache)
+        try:
+            self.hash_cache.save(HASH_CACHE_FILE)
+        except (IOError, OSError):
+            pass
+        self.duplicates_found.emit(path, duplicates)
+
+    def show_duplicates(self, path, duplicates):
+        """
+        Shows the runs of duplicate frames that were found, written as collapsed names.
+        :param path: the path that was checked
+        :param duplicates: Dictionary of sequence to the list of ranges of identical frames
+        """
+        if not duplicates:
+            self.ui.statusbar.showMessage("No duplicate frames found", 5000)
+            return
+        self.ui.statusbar.clearMessage()
+        lines = []
+        for sequence in sorted(duplicates):
+            basename, frame_padding, ext = sequence
+            for start, end in duplicates[sequence]:
+                lines.append(Collapser.get_condensed_filename(basename, frame_padding, ext, start, end))
+        QtWidgets.QMessageBox.information(self, "Duplicate Frames",
+                                          "Identical consecutive frames in " + path + ":\n\n" + "\n".join(lines))
+
     def connect_buttons(self):
         """
         Connects all buttons and other click events to their corresponding functions
@@ -239,39 +440,61 @@ class MainWindow(QMainWindow):
         This method populates the visual file browser on the lefthand side of the ui based on the path stored in the
         file browser. Creates all of the widgets and adds them to the tree.
         """
-        # gets all filenames from the current path
-        files = self.fb.get_files_in_dir()
-        self.collapser.make_final_list(files)
-        collapsedFiles = self.collapser.get_result_files()
-        collapsedTF = self.collapser.get_collapsed_list()
+        # uses the prefetched scan of the current path if there is one, otherwise gets the scan from the shared scan
+        # service, which scans the path in-process if the service isn't running or doesn't answer quickly
+        scan = self.prefetcher.take(self.fb.get_current_path())
+        if scan is None:
+            scan = get_scan(self.fb.get_current_path(), self.collapser, GUI_TIMEOUT)
+        # scans from the service carry no listing, so the browser lists the directory itself if it ever needs to
+        self.fb.set_files(scan.files)
+        collapsedFiles = scan.collapsed_files
+        collapsedTF = scan.collapsed_list
+        folderTF = scan.folder_list
         widgets = []
+        folders = []
         # Create widgets to add to the tree list
         for i in range(0, len(collapsedFiles)):
             widget = QtWidgets.QTreeWidgetItem()
             widget.setText(0, collapsedFiles[i])
-            type = "Folder" if self.fb.is_dir(collapsedFiles[i]) else "File"
+            type = "Folder" if folderTF[i] else "File"
             widget.setText(2, type)
             collapsed = "Yes" if collapsedTF[i] else "No"
             widget.setText(1, collapsed)
             widgets.append(widget)
+            if folderTF[i]:
+                folders.append(collapsedFiles[i])
         # Add all widgets to the tree
         self.ui.systemTreeWidget.addTopLevelItems(widgets)
+        # Starts a new, empty selection over this listing
+        self.selection = Selection(list(collapsedFiles), list(collapsedTF))
+        self.frame_picks = self.selection.new_selection()
+        # Once the event loop is idle, start scanning the subfolders in the background
+        path = self.fb.get_current_path()
+        QtCore.QTimer.singleShot(0, lambda: self.prefetch_subfolders(path, folders))
+
+    def prefetch_subfolders(self, path, folders):
+        """
+        Starts scanning the subfolders of the displayed directory in the background so that moving forward into one
+        of them is fast. Nothing is done if the user has already moved somewhere else.
+        :param path: the path that was displayed when the prefetch was requested
+        :param folders: names of the folders in that path
+        """
+        if path == self.fb.get_current_path():
+            self.prefetcher.prefetch(path, folders)
 
     def populate_selected_tree(self):
         """
         This method populates the righthand tree of files. This is called whenever a new file is selected or deselected.
-        It creates new widgets based on the old and adds them to the other tree.
+        It creates one widget for each file and each selected range of a sequence, sorted by name.
         """
         # Clears any old widgets so duplicates are not added
         self.ui.selectedTreeWidget.clear()
         new_widgets = []
-        for widget in self.widgets:
+        for name, is_collapsed in self.selection.get_condensed_names():
             new_widg = QtWidgets.QTreeWidgetItem()
-            name = widget.text(0)
             new_widg.setText(0, name)
-            new_widg.setText(1, widget.text(1))
+            new_widg.setText(1, "Yes" if is_collapsed else "No")
             new_widgets.append(new_widg)
-        new_widgets.sort()
         # Add all widgets to the tree
         self.ui.selectedTreeWidget.addTopLevelItems(new_widgets)
 
@@ -0,0 +1,202 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+from PySide2 import QtCore
+from PySide2.QtCore import QStringListModel
+from PySide2.QtWidgets import QCompleter
+from filebrowser import FileBrowser
+
+# Milliseconds to wait after the last keystroke before looking for completions
+DEBOUNCE_MS = 200
+# Seconds a cached directory listing is trusted before it is listed again
+INDEX_TTL = 30
+# Maximum number of directory listings kept in the index
+INDEX_SIZE = 512
+
+
+class DirectoryIndex:
+    """
+    This class keeps a cache of the folder names inside directories, which is used to complete paths without listing
+    the same directory over and over. Listings expire after INDEX_TTL seconds so new folders show up eventually.
+    """
+
+    # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
+
+    def __init__(self, ttl=INDEX_TTL, size=INDEX_SIZE):
+        """
+        Constructor creates the empty cache.
+        :param ttl: seconds a listing is kept
+        :param size: maximum number of listings kept
+        """
+        self.ttl = ttl
+        self.size = size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    # METHODS ----------------------------------------------------------------------------------------------------------
+
+    def get_cached_folders(self, path):
+        """
+        Gets the folder names in a directory from the cache only, so it never touches the file system.
+        :param path: full path of the directory
+        :return: sorted list of folder names, or None if the directory is not cached
+        """
+        with self.lock:
+            entry = self.cache.get(path)
+            if entry is None:
+                return None
+            stamp, folders = entry
+            if time.time() - stamp > self.ttl:
+                del self.cache[path]
+                return None
+            # moves the listing to the end so it is the last to be thrown away
+            self.cache.pop(path)
+            self.cache[path] = entry
+            return folders
+
+    def get_folders(self, path):
+        """
+        Gets the folder names in a directory, listing it if it is not already cached. Hidden folders are left out.
+        Directories that can't be read give an empty list.
+        :param path: full path of the directory
+        :return: sorted list of folder names
+        """
+        folders = self.get_cached_folders(path)
+        if folders is not None:
+            return folders
+        folders = []
+        try:
+            for entry in os.scandir(path):
+                if not FileBrowser.is_hidden_file(entry.name) and entry.is_dir():
+                    folders.append(entry.name)
+        except (IOError, OSError):
+            pass
+        folders.sort()
+        with self.lock:
+            self.cache[path] = (time.time(), folders)
+            while len(self.cache) > self.size:
+                self.cache.popitem(last=False)
+        return folders
+
+    @staticmethod
+    def split_path(text, base_path):
+        """
+        Splits typed text into the directory as typed, the real directory that is being completed in and the start of
+        the folder name. "~" is expanded and relative paths are resolved against the base path. For example,
+        ~/shows/sh would give ~/shows, /home/user/shows and sh.
+        :param text: text typed into the path box
+        :param base_path: directory relative paths are resolved against
+        :return: tuple of the typed directory, the real directory and the folder name prefix
+        """
+        typed, prefix = os.path.split(text)
+        directory = os.path.join(base_path, os.path.expanduser(typed))
+        return typed, os.path.normpath(directory), prefix
+
+    def complete(self, text, base_path, cached_only=False):
+        """
+        Finds all folders that start with the typed text. The completions start with exactly what was typed, so they
+        match the text in the line edit even when it holds "~" or a relative path.
+        :param text: text typed into the path box
+        :param base_path: directory relative paths are resolved against
+        :param cached_only: if True, only the cache is used and None is returned when the directory is not cached
+        :return: sorted list of completed paths
+        """
+        typed, directory, prefix = DirectoryIndex.split_path(text, base_path)
+        if cached_only:
+            folders = self.get_cached_folders(directory)
+            if folders is None:
+                return None
+        else:
+            folders = self.get_folders(directory)
+        return [os.path.join(typed, folder) for folder in folders if folder.startswith(prefix)]
+
+
+class PathCompleter(QtCore.QObject):
+    """
+    This class adds completion to the path line edit. Lookups are started once the user stops typing for DEBOUNCE_MS
+    and run on a worker thread, so typing is never blocked by a slow file system. Answers for directories already in
+    the index are shown without going to the worker.
+    """
+
+    # Emitted from the worker thread with the request number, the text that was completed and the completions
+    completions_ready = QtCore.Signal(int, str, list)
+
+    # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
+
+    def __init__(self, line_edit, get_base_path, index=None):
+        """
+        Constructor sets up the completer on the line edit, the debounce timer and the worker thread.
+        :param line_edit: the QLineEdit to complete paths in
+        :param get_base_path: function giving the directory relative paths are resolved against
+        :param index: DirectoryIndex to use, a new one is made when None
+        """
+        super(PathCompleter, self).__init__(line_edit)
+        self.line_edit = line_edit
+        self.get_base_path = get_base_path
+        self.index = index if index is not None else DirectoryIndex()
+        self.pool = ThreadPool(1)
+        self.request = 0
+
+        self.model = QStringListModel(self)
+        self.completer = QCompleter(self.model, self)
+        self.completer.setCaseSensitivity(QtCore.Qt.CaseSensitive)
+        self.line_edit.setCompleter(self.completer)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(DEBOUNCE_MS)
+        self.timer.timeout.connect(self.start_lookup)
+
+        self.line_edit.textEdited.connect(self.on_text_edited)
+        self.completions_ready.connect(self.show_completions)
+
+    # METHODS ----------------------------------------------------------------------------------------------------------
+
+    def on_text_edited(self, text):
+        """
+        Restarts the debounce timer every time the user types.
+        :param text: the current text of the line edit
+        """
+        self.request += 1
+        self.timer.start()
+
+    def start_lookup(self):
+        """
+        Looks up completions for the current text. The answer is shown right away if the directory is in the index,
+        otherwise the lookup is sent to the worker thread.
+        """
+        text = self.line_edit.text()
+        if not text:
+            return
+        base_path = self.get_base_path()
+        completions = self.index.complete(text, base_path, cached_only=True)
+        if completions is not None:
+            self.show_completions(self.request, text, completions)
+        else:
+            self.pool.apply_async(self.run_lookup, (self.request, text, base_path))
+
+    def run_lookup(self, request, text, base_path):
+        """
+        Runs a lookup on the worker thread. Lookups that are already out of date are skipped.
+        :param request: the request number the lookup was started with
+        :param text: the text to complete
+        :param base_path: directory relative paths are resolved against
+        """
+        if request != self.request:
+            return
+        self.completions_ready.emit(request, text, self.index.complete(text, base_path))
+
+    def show_completions(self, request, text, completions):
+        """
+        Shows the completions in the popup, unless the user has typed something else since they were asked for.
+        :param request: the request number the lookup was started with
+        :param text: the text that was completed
+        :param completions: the list of completed paths
+        """
+        if request != self.request or text != self.line_edit.text():
+            return
+        self.model.setStringList(completions)
+        if completions:
+            self.completer.complete()
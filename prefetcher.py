@@ -0,0 +1,176 @@
+import os
+import threading
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+from collapser import Collapser
+from filebrowser import FileBrowser
+
+# Number of subfolders that are scanned at the same time in the background
+PREFETCH_WORKERS = 2
+# Maximum number of subfolders queued for scanning each time a directory is entered
+PREFETCH_LIMIT = 16
+# Maximum number of finished scans kept around waiting to be used
+CACHE_SIZE = 64
+# Maximum number of visited directories remembered for most-recently-used ordering
+HISTORY_SIZE = 256
+
+
+class DirectoryScan:
+    """
+    This class holds everything the file system tree needs to display a directory: the raw listing, the collapsed
+    names, which of those were collapsed and which of them are folders.
+    """
+
+    # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
+
+    def __init__(self, path, mtime, files, collapsed_files, collapsed_list, folder_list):
+        """
+        Constructor stores the results of a scan.
+        :param path: full path of the scanned directory
+        :param mtime: modification time of the directory when it was scanned
+        :param files: sorted list of visible file names
+        :param collapsed_files: the final list of names made by the collapser
+        :param collapsed_list: booleans indicating which names were collapsed
+        :param folder_list: booleans indicating which names are folders
+        """
+        self.path = path
+        self.mtime = mtime
+        self.files = files
+        self.collapsed_files = collapsed_files
+        self.collapsed_list = collapsed_list
+        self.folder_list = folder_list
+
+
+def scan_directory(path, collapser=None):
+    """
+    Lists, collapses and checks the type of every entry in a directory. A new collapser is made when none is passed in,
+    which keeps this function safe to call from a background thread.
+    :param path: full path of the directory to scan
+    :param collapser: collapser to use for the scan
+    :return: DirectoryScan holding the results
+    """
+    if collapser is None:
+        collapser = Collapser()
+    mtime = os.stat(path).st_mtime
+    files = FileBrowser.list_visible_files(path)
+    collapser.make_final_list(files)
+    collapsed_files = list(collapser.get_result_files())
+    collapsed_list = list(collapser.get_collapsed_list())
+    folder_list = [os.path.isdir(path + "/" + name) for name in collapsed_files]
+    return DirectoryScan(path, mtime, files, collapsed_files, collapsed_list, folder_list)
+
+
+class Prefetcher:
+    """
+    This class scans the subfolders of the current directory in the background so that moving forward into one of
+    them can use a finished scan instead of listing and collapsing it again. Folders that were visited most recently are
+    scanned first. Moving to a new directory cancels any scans that have not started yet.
+    """
+
+    # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
+
+    def __init__(self, workers=PREFETCH_WORKERS, limit=PREFETCH_LIMIT, cache_size=CACHE_SIZE, scanner=scan_directory):
+        """
+        Constructor creates the worker pool and the cache of finished scans.
+        :param workers: number of subfolders scanned at the same time
+        :param limit: maximum number of subfolders queued per directory
+        :param cache_size: maximum number of finished scans kept
+        :param scanner: function taking a path and a collapser that returns a DirectoryScan
+        """
+        self.pool = ThreadPool(workers)
+        self.scanner = scanner
+        self.limit = limit
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.history = OrderedDict()
+        self.pending = {}
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    # METHODS ----------------------------------------------------------------------------------------------------------
+
+    def visit(self, path):
+        """
+        Records that the user navigated to a path, which moves it to the front of the most-recently-used ordering.
+        :param path: full path that was navigated to
+        """
+        path = os.path.abspath(path)
+        with self.lock:
+            self.history.pop(path, None)
+            self.history[path] = True
+            while len(self.history) > HISTORY_SIZE:
+                self.history.popitem(last=False)
+
+    def cancel(self):
+        """
+        Cancels every scan that has not started yet. Finished scans stay in the cache.
+        """
+        with self.lock:
+            self.generation += 1
+
+    def prefetch(self, path, folders):
+        """
+        Cancels any earlier scans and queues up the given subfolders of a path for scanning in the background.
+        :param path: full path of the directory being displayed
+        :param folders: names of the folders inside that directory
+        """
+        with self.lock:
+            self.generation += 1
+            generation = self.generation
+            recent = list(self.history.keys())
+        rank = {}
+        for i, visited in enumerate(reversed(recent)):
+            rank[visited] = i
+        full_paths = [os.path.abspath(os.path.join(path, folder)) for folder in folders]
+        full_paths.sort(key=lambda full_path: (rank.get(full_path, len(rank)), full_path))
+        for full_path in full_paths[:self.limit]:
+            with self.lock:
+                # a path still pending from an earlier generation would be skipped by its worker, so it is queued again
+                if full_path in self.cache or self.pending.get(full_path) == generation:
+                    continue
+                self.pending[full_path] = generation
+            self.pool.apply_async(self.run_scan, (full_path, generation))
+
+    def run_scan(self, path, generation):
+        """
+        Scans one folder on a worker thread and stores the result, unless the scan was cancelled before it started.
+        Folders that can't be read are skipped.
+        :param path: full path of the folder to scan
+        :param generation: the generation the scan was queued in
+        """
+        try:
+            with self.lock:
+                if generation != self.generation or path in self.cache:
+                    return
+            try:
+                scan = self.scanner(path, Collapser(processes=1))
+            except (IOError, OSError):
+                return
+            with self.lock:
+                self.cache[path] = scan
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        finally:
+            with self.lock:
+                # only the newest job queued for the path clears it, so a skipped stale job can't hide a newer one
+                if self.pending.get(path) == generation:
+                    del self.pending[path]
+
+    def take(self, path):
+        """
+        Gets the finished scan of a path and removes it from the cache. A scan is thrown away if the directory has
+        changed since it was made.
+        :param path: full path of the directory
+        :return: the DirectoryScan, or None if there is no usable scan
+        """
+        path = os.path.abspath(path)
+        with self.lock:
+            scan = self.cache.pop(path, None)
+        if scan is None:
+            return None
+        try:
+            if os.stat(path).st_mtime != scan.mtime:
+                return None
+        except (IOError, OSError):
+            return None
+        return scan
@@ -0,0 +1,274 @@
+"""
+Measures how responsive the main window stays while it is used. The window is run on the offscreen Qt platform against
+a synthetic directory tree, a script of user actions is played on it, and for every action the longest time the event
+loop was blocked is recorded together with the number of items in both trees. An action that raises is recorded as
+failed and the script moves on. The results can be checked against a stall budget, either from the command line or
+from tests.
+
+Usage:
+    python responsiveness.py [--sequences N] [--frames N] [--folders N] [--budget-ms MS]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import traceback
+
+# The offscreen platform needs to be chosen before Qt is loaded
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide2 import QtCore
+from PySide2.QtWidgets import QApplication
+from main import MainWindow
+
+# Milliseconds between heartbeats of the event loop. The longest gap between two heartbeats is the longest stall.
+HEARTBEAT_MS = 5
+# Milliseconds the event loop keeps running after an action, so work it deferred to the event loop is measured too
+SETTLE_MS = 200
+
+
+class ActionResult:
+    """
+    This class stores what was measured for one action.
+    """
+
+    # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
+
+    def __init__(self, label, duration_ms, longest_stall_ms, system_items, selected_items, error=None):
+        """
+        Constructor stores the measurements.
+        :param label: name of the action
+        :param duration_ms: how long the action itself took to run
+        :param longest_stall_ms: longest time the event loop was blocked while and after the action ran
+        :param system_items: number of top level items in the file system tree afterwards
+        :param selected_items: number of top level items in the selected tree afterwards
+        :param error: traceback of the exception the action raised, or None if it ran without one
+        """
+        self.label = label
+        self.duration_ms = duration_ms
+        self.longest_stall_ms = longest_stall_ms
+        self.system_items = system_items
+        self.selected_items = selected_items
+        self.error = error
+
+
+class StallMonitor(QtCore.QObject):
+    """
+    This class runs actions on the event loop of a window and measures the longest time between two heartbeats of a
+    fast repeating timer. While an action blocks the event loop no heartbeat can fire, so the longest gap is the
+    longest stall the user would have seen.
+    """
+
+    # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
+
+    def __init__(self, window):
+        """
+        Constructor sets up the heartbeat timer.
+        :param window: the MainWindow being measured
+        """
+        super(StallMonitor, self).__init__()
+        self.window = window
+        self.heartbeat = QtCore.QTimer(self)
+        self.heartbeat.setInterval(HEARTBEAT_MS)
+        self.heartbeat.timeout.connect(self.on_heartbeat)
+        self.last_beat = 0
+        self.longest_gap = 0
+        self.duration = 0
+        self.error = None
+
+    # METHODS ----------------------------------------------------------------------------------------------------------
+
+    def on_heartbeat(self):
+        """
+        Records the gap since the last heartbeat.
+        """
+        now = time.perf_counter()
+        self.longest_gap = max(self.longest_gap, now - self.last_beat)
+        self.last_beat = now
+
+    def measure(self, label, action):
+        """
+        Runs one action from the event loop and keeps the loop running for SETTLE_MS afterwards. The loop is stopped
+        even if the action raises, and the traceback is kept in the result.
+        :param label: name of the action
+        :param action: function that performs the action
+        :return: ActionResult holding the measurements
+        """
+        loop = QtCore.QEventLoop()
+
+        def run():
+            started = time.perf_counter()
+            try:
+                action()
+            except Exception:
+                self.error = traceback.format_exc()
+            finally:
+                self.duration = time.perf_counter() - started
+                QtCore.QTimer.singleShot(SETTLE_MS, loop.quit)
+
+        self.error = None
+        self.longest_gap = 0
+        self.last_beat = time.perf_counter()
+        self.heartbeat.start()
+        QtCore.QTimer.singleShot(0, run)
+        loop.exec_()
+        self.heartbeat.stop()
+        self.on_heartbeat()
+
+        return ActionResult(label, self.duration * 1000, self.longest_gap * 1000,
+                            self.window.ui.systemTreeWidget.topLevelItemCount(),
+                            self.window.ui.selectedTreeWidget.topLevelItemCount(), self.error)
+
+
+def make_synthetic_tree(root, sequences=10, frames=200, folders=5):
+    """
+    Creates a directory tree to run the window against. The root holds a number of folders, and every folder holds
+    the same set of empty image sequences plus a few regular files.
+    :param root: directory to create the tree in
+    :param sequences: number of sequences in each folder
+    :param frames: number of frames in each sequence
+    :param folders: number of folders in the root
+    :return: list of the folder names
+    """
+    names = ["shot_" + str(i).zfill(3) for i in range(0, folders)]
+    for name in names:
+        folder = os.path.join(root, name)
+        os.mkdir(folder)
+        for seq in range(0, sequences):
+            for frame in range(1001, 1001 + frames):
+                open(os.path.join(folder, "render_" + str(seq) + "." + str(frame).zfill(4) + ".exr"), "w").close()
+        for extra in ("notes.txt", "comp_v001.nk", "comp_v002.nk"):
+            open(os.path.join(folder, extra), "w").close()
+    return names
+
+
+def select_item(window, name):
+    """
+    Selects only the item with the given name in the file system tree, the way a user would before pressing ">".
+    :param window: the MainWindow
+    :param name: text of the item to select
+    """
+    tree = window.ui.systemTreeWidget
+    tree.clearSelection()
+    for item in tree.findItems(name, QtCore.Qt.MatchExactly, 0):
+        item.setSelected(True)
+
+
+def move_into(window, name):
+    """
+    Selects a folder in the file system tree and presses ">".
+    :param window: the MainWindow
+    :param name: name of the folder
+    """
+    select_item(window, name)
+    window.move_forward()
+
+
+def make_script(window, root, folders):
+    """
+    Makes the list of actions played on the window: navigating into and out of folders, selecting and deselecting
+    everything, and expanding and collapsing the selected files.
+    :param window: the MainWindow
+    :param root: root of the synthetic tree
+    :param folders: names of the folders in the root
+    :return: list of (label, action) tuples
+    """
+    script = [("update_path root", lambda: window.update_path(root))]
+    for name in folders[:3]:
+        script.append(("move_forward " + name, lambda name=name: move_into(window, name)))
+        script.append(("select_all", window.select_all))
+        script.append(("expand", window.expand_collapsed_clicked))
+        script.append(("collapse", window.expand_collapsed_clicked))
+        script.append(("deselect_all", window.deselect_all))
+        script.append(("move_back", window.move_back))
+    return script
+
+
+def run_harness(sequences=10, frames=200, folders=5):
+    """
+    Builds a synthetic tree in a temporary directory, plays the script on a new MainWindow and removes the tree
+    afterwards.
+    :param sequences: number of sequences in each folder
+    :param frames: number of frames in each sequence
+    :param folders: number of folders in the root
+    :return: list of ActionResult, one per action
+    """
+    app = QApplication.instance() or QApplication(sys.argv)
+    root = tempfile.mkdtemp()
+    try:
+        names = make_synthetic_tree(root, sequences, frames, folders)
+        window = MainWindow(app)
+        window.show()
+        monitor = StallMonitor(window)
+        results = [monitor.measure(label, action) for label, action in make_script(window, root, names)]
+        window.close()
+        return results
+    finally:
+        shutil.rmtree(root)
+
+
+def over_budget(results, budget_ms):
+    """
+    Finds the actions that stalled the event loop for longer than the budget. Tests can assert that this is empty.
+    :param results: list of ActionResult
+    :param budget_ms: longest allowed stall in milliseconds
+    :return: list of the ActionResults over budget
+    """
+    return [result for result in results if result.longest_stall_ms > budget_ms]
+
+
+def failed(results):
+    """
+    Finds the actions that raised an exception.
+    :param results: list of ActionResult
+    :return: list of the ActionResults that failed
+    """
+    return [result for result in results if result.error is not None]
+
+
+def format_results(results):
+    """
+    Makes a table of the results.
+    :param results: list of ActionResult
+    :return: list of lines of the table
+    """
+    lines = ["%-24s %10s %10s %8s %8s" % ("action", "run ms", "stall ms", "system", "selected")]
+    for result in results:
+        lines.append("%-24s %10.1f %10.1f %8d %8d" % (result.label, result.duration_ms, result.longest_stall_ms,
+                                                    result.system_items, result.selected_items))
+        if result.error is not None:
+            lines.append("    failed: " + result.error.strip().splitlines()[-1])
+    return lines
+
+
+def main(args=None):
+    """
+    Runs the harness from the command line and prints the results.
+    :param args: list of command line arguments, sys.argv is used when None
+    :return: exit status, 1 if any action failed or was over the budget and 0 otherwise
+    """
+    parser = argparse.ArgumentParser(description="Measure event loop stalls of the file selector.")
+    parser.add_argument("--sequences", type=int, default=10, help="sequences in each folder")
+    parser.add_argument("--frames", type=int, default=200, help="frames in each sequence")
+    parser.add_argument("--folders", type=int, default=5, help="folders in the root")
+    parser.add_argument("--budget-ms", type=float, default=None, help="longest allowed stall of any action")
+    options = parser.parse_args(args)
+
+    results = run_harness(options.sequences, options.frames, options.folders)
+    for line in format_results(results):
+        print(line)
+    if failed(results):
+        return 1
+    if options.budget_ms is not None:
+        slow = over_budget(results, options.budget_ms)
+        for result in slow:
+            print("over budget: " + result.label)
+        if slow:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""
+A local scan service that lets every copy of the file selector on a workstation share directory scans. The service
+listens on a Unix domain socket, owns a cache of listed and collapsed directories and answers scan requests from
+browser windows and command line tools. When the service isn't running, scans are simply done in-process.
+
+Each request is one line of JSON, {"path": "/full/path"}, and is answered with one line of JSON holding the scan or an
+error.
+
+Usage:
+    python scanservice.py serve [--socket PATH]
+    python scanservice.py scan PATH [--socket PATH]
+"""
+import os
+import sys
+import json
+import socket
+import argparse
+import threading
+from collections import OrderedDict
+from prefetcher import DirectoryScan, scan_directory
+from collapser import Collapser
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+# Maximum number of scans kept by the service
+SERVICE_CACHE_SIZE = 256
+# Seconds a client waits for the service to answer before scanning in-process instead
+CLIENT_TIMEOUT = 60
+# Seconds the GUI thread waits for the service, which is short so a busy service can't freeze the window
+GUI_TIMEOUT = 0.3
+# Name of the socket inside the socket directory
+SOCKET_NAME = "file_selector.sock"
+
+
+def get_socket_path():
+    """
+    Gets the path of the service's socket. It can be set with the FILE_SELECTOR_SOCKET environment variable, and is
+    otherwise in $XDG_RUNTIME_DIR, or in a directory only the current user can use in the temp directory when that
+    isn't set.
+    :return: path of the socket
+    """
+    if not hasattr(os, "getuid"):
+        return os.environ.get("FILE_SELECTOR_SOCKET", "")
+    directory = os.environ.get("XDG_RUNTIME_DIR") or "/tmp/file_selector-" + str(os.getuid())
+    return os.environ.get("FILE_SELECTOR_SOCKET", os.path.join(directory, SOCKET_NAME))
+
+
+def is_owned_by_user(path):
+    """
+    Checks that a file belongs to the current user, so a socket made by someone else is never trusted.
+    :param path: path of the file
+    :return: if the file exists and belongs to the current user
+    """
+    try:
+        return os.stat(path).st_uid == os.getuid()
+    except (IOError, OSError):
+        return False
+
+
+def make_socket_dir(socket_path):
+    """
+    Makes the directory the socket is bound in, only usable by the current user, if it doesn't exist. An existing
+    directory must belong to the current user and must not be writable by anyone else.
+    :param socket_path: path of the socket
+    """
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory, 0o700)
+    stat = os.stat(directory)
+    if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+        raise RuntimeError("The socket directory " + directory + " must belong to you and not be writable by others")
+
+
+def scan_to_dict(scan):
+    """
+    Turns a scan into a dictionary that can be sent as JSON. The raw listing is left out since only the collapsed
+    results are needed to display a directory, and it is by far the largest part of a scan.
+    :param scan: DirectoryScan to send
+    :return: the dictionary
+    """
+    return {"path": scan.path, "mtime": scan.mtime, "collapsed_files": scan.collapsed_files,
+            "collapsed_list": scan.collapsed_list, "folder_list": scan.folder_list}
+
+
+def dict_to_scan(data):
+    """
+    Turns a dictionary received as JSON back into a scan. The raw listing of the scan is None.
+    :param data: the dictionary
+    :return: the DirectoryScan
+    """
+    return DirectoryScan(data["path"], data["mtime"], None, data["collapsed_files"], data["collapsed_list"],
+                         data["folder_list"])
+
+
+class ScanService:
+    """
+    This class holds the scans owned by the service. A cached scan is used while the modification time of its
+    directory is unchanged. When several clients ask for the same directory at once it is only scanned once. Each path
+    being asked for has a lock and a count of the requests using it, and the lock is thrown away once the last of them
+    is done.
+    """
+
+    # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
+
+    def __init__(self, cache_size=SERVICE_CACHE_SIZE):
+        """
+        Constructor creates the empty cache.
+        :param cache_size: maximum number of scans kept
+        """
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.path_locks = {}
+        self.lock = threading.Lock()
+
+    # METHODS ----------------------------------------------------------------------------------------------------------
+
+    def get_scan(self, path):
+        """
+        Gets the scan of a directory, scanning it if there is no up to date scan in the cache.
+        :param path: full path of the directory
+        :return: the DirectoryScan
+        """
+        path = os.path.abspath(path)
+        with self.lock:
+            path_lock = self.path_locks.setdefault(path, [threading.Lock(), 0])
+            path_lock[1] += 1
+        try:
+            # only one thread scans a path at a time, the others wait and use its result
+            with path_lock[0]:
+                mtime = os.stat(path).st_mtime
+                with self.lock:
+                    scan = self.cache.pop(path, None)
+                    if scan is not None and scan.mtime == mtime:
+                        self.cache[path] = scan
+                        return scan
+                scan = scan_directory(path, Collapser(processes=1))
+                with self.lock:
+                    self.cache[path] = scan
+                    while len(self.cache) > self.cache_size:
+                        self.cache.popitem(last=False)
+                return scan
+        finally:
+            # the lock is only thrown away when no other request is holding or waiting for it
+            with self.lock:
+                path_lock[1] -= 1
+                if not path_lock[1]:
+                    del self.path_locks[path]
+
+
+class ScanRequestHandler(socketserver.StreamRequestHandler):
+    """
+    This class answers the requests sent over one connection to the service.
+    """
+
+    def handle(self):
+        """
+        Reads requests one line at a time and writes back one line per answer.
+        """
+        for line in self.rfile:
+            try:
+                request = json.loads(line.decode("utf-8"))
+                answer = scan_to_dict(self.server.service.get_scan(request["path"]))
+            except (IOError, OSError, ValueError, KeyError) as error:
+                answer = {"error": str(error)}
+            self.wfile.write((json.dumps(answer) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class ScanServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    This class is the Unix domain socket server of the service, answering each connection on its own thread.
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path, service):
+        """
+        Constructor binds the socket. The umask makes the socket only usable by the current user from the moment it is
+        made.
+        :param socket_path: path of the socket
+        :param service: ScanService answering the requests
+        """
+        old_umask = os.umask(0o177)
+        try:
+            socketserver.UnixStreamServer.__init__(self, socket_path, ScanRequestHandler)
+        finally:
+            os.umask(old_umask)
+        self.service = service
+
+
+def is_service_running(socket_path):
+    """
+    Checks if a service is listening on the socket.
+    :param socket_path: path of the socket
+    :return: if the service is running
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+        return True
+    except (IOError, OSError):
+        return False
+    finally:
+        client.close()
+
+
+def serve(socket_path):
+    """
+    Runs the service until it is interrupted. The socket is bound in a directory only the current user can write to,
+    and a socket file left behind by a service that is no longer running is removed first.
+    :param socket_path: path of the socket
+    """
+    make_socket_dir(socket_path)
+    if os.path.exists(socket_path):
+        if is_service_running(socket_path):
+            raise RuntimeError("A scan service is already running on " + socket_path)
+        os.remove(socket_path)
+    server = ScanServer(socket_path, ScanService())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+
+
+def request_scan(path, socket_path=None, timeout=CLIENT_TIMEOUT):
+    """
+    Asks the service for the scan of a directory. A socket that doesn't belong to the current user is not used.
+    :param path: full path of the directory
+    :param socket_path: path of the service's socket, get_socket_path() is used when None
+    :param timeout: seconds to wait for the service to connect and to answer
+    :return: the DirectoryScan, or None if the service is not running, could not scan the directory or took too long
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    socket_path = socket_path or get_socket_path()
+    if not socket_path or not is_owned_by_user(socket_path):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(socket_path)
+        client.sendall((json.dumps({"path": os.path.abspath(path)}) + "\n").encode("utf-8"))
+        answer = json.loads(client.makefile("rb").readline().decode("utf-8"))
+    except (IOError, OSError, ValueError):
+        return None
+    finally:
+        client.close()
+    if "error" in answer:
+        return None
+    return dict_to_scan(answer)
+
+
+def get_scan(path, collapser=None, timeout=CLIENT_TIMEOUT):
+    """
+    Gets the scan of a directory from the service, or scans it in-process when the service can't answer in time.
+    :param path: full path of the directory
+    :param collapser: collapser to use for an in-process scan
+    :param timeout: seconds to wait for the service
+    :return: the DirectoryScan
+    """
+    scan = request_scan(path, timeout=timeout)
+    if scan is None:
+        scan = scan_directory(path, collapser)
+    return scan
+
+
+def main(args=None):
+    """
+    Runs the service, or a scan through it, from the command line.
+    :param args: list of command line arguments, sys.argv is used when None
+    :return: exit status
+    """
+    parser = argparse.ArgumentParser(description="Shared directory scan service for the file selector.")
+    parser.add_argument("command", choices=["serve", "scan"], help="run the service, or print the scan of a path")
+    parser.add_argument("path", nargs="?", help="directory to scan")
+    parser.add_argument("--socket", default=None, help="path of the service's socket")
+    options = parser.parse_args(args)
+    socket_path = options.socket or get_socket_path()
+
+    if options.command == "serve":
+        serve(socket_path)
+        return 0
+
+    if options.path is None:
+        parser.error("scan needs a path")
+    scan = request_scan(options.path, socket_path)
+    if scan is None:
+        scan = scan_directory(os.path.abspath(options.path))
+    for i in range(0, len(scan.collapsed_files)):
+        print(scan.collapsed_files[i] + ("/" if scan.folder_list[i] else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+from collapser import Collapser
+from funcs import *
+
+
+class Selection:
+    """
+    This class stores a selection of files as compact ranges instead of one item per file. Sequences are identified by
+    their base name, frame padding and extension (the same keys as Collapser.get_sequence_ranges) and map to sorted
+    lists of (start, end) frame ranges, so part of a sequence can be selected without expanding it. Files that are not
+    part of a sequence are stored by name.
+
+    A selection knows the listing it was made from, which lets select_all only set a flag. The listing is only turned
+    into ranges when something needs the actual contents of an everything selection.
+    """
+
+    # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
+
+    def __init__(self, names=None, collapsed=None):
+        """
+        Constructor creates an empty selection over a listing.
+        :param names: the final list of names made by the collapser
+        :param collapsed: booleans indicating which of those names were collapsed
+        """
+        self.names = names if names is not None else []
+        self.collapsed = collapsed if collapsed is not None else []
+        self.universe = None
+        self.everything = False
+        self.sequences = {}
+        self.files = set()
+
+    # GETTERS & SETTERS ------------------------------------------------------------------------------------------------
+
+    def get_universe(self):
+        """
+        This method gets the ranges and files of the whole listing, working them out the first time they are needed.
+        :return: tuple of the dictionary of sequence ranges and the set of files
+        """
+        if self.universe is None:
+            sequences = {}
+            files = set()
+            for i in range(0, len(self.names)):
+                if self.collapsed[i]:
+                    basename, frame_padding, ext, start, end = Collapser.parse_condensed(self.names[i])
+                    sequences.setdefault((basename, frame_padding, ext), []).append((start, end))
+                else:
+                    files.add(self.names[i])
+            # sorts the ranges of each sequence and merges any that touch
+            for sequence in sequences:
+                sequences[sequence] = union_ranges(sequences[sequence], [])
+            self.universe = (sequences, files)
+        return self.universe
+
+    def get_sequence_ranges(self):
+        """
+        This method gets the selected ranges of every sequence.
+        :return: Dictionary of sequence to sorted list of ranges
+        """
+        if self.everything:
+            return self.get_universe()[0]
+        return self.sequences
+
+    def get_files(self):
+        """
+        This method gets the selected files that are not part of a sequence.
+        :return: set of file names
+        """
+        if self.everything:
+            return self.get_universe()[1]
+        return self.files
+
+    # METHODS ----------------------------------------------------------------------------------------------------------
+
+    def new_selection(self):
+        """
+        Makes an empty selection over the same listing as this one.
+        :return: the new Selection
+        """
+        result = Selection(self.names, self.collapsed)
+        result.universe = self.universe
+        return result
+
+    def select_all(self):
+        """
+        Selects everything in the listing. This only sets a flag, so it takes the same time for any listing size.
+        """
+        self.everything = True
+        self.sequences = {}
+        self.files = set()
+
+    def deselect_all(self):
+        """
+        Clears the selection.
+        """
+        self.everything = False
+        self.sequences = {}
+        self.files = set()
+
+    def is_empty(self):
+        """
+        Indicates if nothing is selected.
+        :return: if the selection is empty
+        """
+        if self.everything:
+            return len(self.names) == 0
+        return not self.sequences and not self.files
+
+    def make_explicit(self):
+        """
+        Turns an everything selection into ranges and files, which is needed before part of it can be changed.
+        """
+        if self.everything:
+            sequences, files = self.get_universe()
+            self.sequences = dict((sequence, list(ranges)) for sequence, ranges in sequences.items())
+            self.files = set(files)
+            self.everything = False
+
+    def select_name(self, name, is_collapsed):
+        """
+        Selects an item of the listing by the name it is displayed with.
+        :param name: collapsed name of a sequence, or the name of a file
+        :param is_collapsed: if the name is a collapsed name
+        """
+        if self.everything:
+            return
+        if is_collapsed:
+            basename, frame_padding, ext, start, end = Collapser.parse_condensed(name)
+            self.select_frames((basename, frame_padding, ext), start, end)
+        else:
+            self.files.add(name)
+
+    def select_frames(self, sequence, start, end):
+        """
+        Adds a range of frames of a sequence to the selection.
+        :param sequence: tuple of (basename, frame_padding, extension)
+        :param start: first frame to select
+        :param end: last frame to select
+        """
+        if self.everything:
+            return
+        self.sequences[sequence] = union_ranges(self.sequences.get(sequence, []), [(start, end)])
+
+    def deselect_frames(self, sequence, start, end):
+        """
+        Removes a range of frames of a sequence from the selection.
+        :param sequence: tuple of (basename, frame_padding, extension)
+        :param start: first frame to deselect
+        :param end: last frame to deselect
+        """
+        self.make_explicit()
+        ranges = subtract_ranges(self.sequences.get(sequence, []), [(start, end)])
+        if ranges:
+            self.sequences[sequence] = ranges
+        else:
+            self.sequences.pop(sequence, None)
+
+    def union(self, other):
+        """
+        Makes a new selection holding everything in this selection or the other one.
+        :param other: the other Selection
+        :return: the new Selection, over the listing of this one
+        """
+        result = self.new_selection()
+        if self.everything or other.everything:
+            result.everything = True
+            return result
+        for sequence in set(self.sequences) | set(other.sequences):
+            result.sequences[sequence] = union_ranges(self.sequences.get(sequence, []),
+                                                      other.sequences.get(sequence, []))
+        result.files = self.files | other.files
+        return result
+
+    def difference(self, other):
+        """
+        Makes a new selection holding everything in this selection that is not in the other one.
+        :param other: the other Selection
+        :return: the new Selection, over the listing of this one
+        """
+        result = self.new_selection()
+        if other.everything:
+            return result
+        other_sequences = other.get_sequence_ranges()
+        for sequence, ranges in self.get_sequence_ranges().items():
+            if sequence in other_sequences:
+                ranges = subtract_ranges(ranges, other_sequences[sequence])
+            if ranges:
+                result.sequences[sequence] = list(ranges)
+        result.files = self.get_files() - other.get_files()
+        return result
+
+    def count_frames(self):
+        """
+        Counts the selected frames of every sequence.
+        :return: the number of frames
+        """
+        total = 0
+        for ranges in self.get_sequence_ranges().values():
+            total += count_frames(ranges)
+        return total
+
+    def get_condensed_names(self):
+        """
+        Exports the selection as condensed names, with one name per range, so that it can be displayed or handed to
+        other tools without listing every frame.
+        :return: sorted list of (name, is_collapsed) tuples
+        """
+        names = []
+        for sequence, ranges in self.get_sequence_ranges().items():
+            basename, frame_padding, ext = sequence
+            for start, end in ranges:
+                names.append((Collapser.get_condensed_filename(basename, frame_padding, ext, start, end), True))
+        for name in self.get_files():
+            names.append((name, False))
+        names.sort()
+        return names
+
+    def __eq__(self, other):
+        """
+        Two selections are equal when they hold the same ranges and files.
+        :param other: the other Selection
+        :return: if the selections are equal
+        """
+        if not isinstance(other, Selection):
+            return NotImplemented
+        if self.everything and other.everything:
+            return self.names == other.names
+        return self.get_sequence_ranges() == other.get_sequence_ranges() and self.get_files() == other.get_files()
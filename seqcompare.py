@@ -0,0 +1,213 @@
+"""
+Compares the sequences in two directories, for example a local render directory against its published copy. The
+comparison is done on the frame ranges made by the collapser, so its cost depends on the number of sequences and
+ranges rather than the number of frames. Only the size check has to look at individual frames.
+
+Usage:
+    python seqcompare.py [--sizes] [--all] path_a path_b
+"""
+import os
+import sys
+import argparse
+from collapser import Collapser
+from scanservice import get_scan
+from funcs import *
+
+
+class SequenceDiff:
+    """
+    This class stores the differences found for one sequence, which is identified by its base name, frame padding and
+    extension. All frames are stored as sorted lists of inclusive (start, end) ranges.
+    """
+
+    # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
+
+    def __init__(self, sequence, only_a, only_b, both):
+        """
+        Constructor stores the ranges of the sequence.
+        :param sequence: tuple of (basename, frame_padding, extension)
+        :param only_a: ranges of frames only found in the first directory
+        :param only_b: ranges of frames only found in the second directory
+        :param both: ranges of frames found in both directories
+        """
+        self.sequence = sequence
+        self.only_a = only_a
+        self.only_b = only_b
+        self.both = both
+        self.size_mismatch = []
+
+    # METHODS ----------------------------------------------------------------------------------------------------------
+
+    def is_different(self):
+        """
+        Indicates if the sequence differs at all between the two directories.
+        :return: if any frame is missing on one side or has a different size
+        """
+        return bool(self.only_a or self.only_b or self.size_mismatch)
+
+    def get_condensed_names(self, ranges):
+        """
+        Turns ranges of this sequence into condensed names, using the same format as the rest of the program.
+        :param ranges: list of (start, end) ranges
+        :return: list of condensed names
+        """
+        basename, frame_padding, ext = self.sequence
+        return [Collapser.get_condensed_filename(basename, frame_padding, ext, start, end) for start, end in ranges]
+
+    def get_frame_name(self, frame):
+        """
+        Builds the file name of one frame of this sequence.
+        :param frame: the frame number
+        :return: the file name
+        """
+        basename, frame_padding, ext = self.sequence
+        return basename + "." + Collapser.make_padding(frame, frame_padding) + "." + ext
+
+
+class DirectoryDiff:
+    """
+    This class stores the result of comparing two directories: one SequenceDiff per sequence, and the regular files
+    (which are not part of any sequence) that are only in one directory or have different sizes.
+    """
+
+    # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
+
+    def __init__(self, path_a, path_b):
+        """
+        Constructor creates the empty lists for the comparison results.
+        :param path_a: full path of the first directory
+        :param path_b: full path of the second directory
+        """
+        self.path_a = path_a
+        self.path_b = path_b
+        self.sequences = []
+        self.only_a_files = []
+        self.only_b_files = []
+        self.size_mismatch_files = []
+
+
+def get_sequences_and_files(path):
+    """
+    Lists and collapses a directory, through the scan service when it is running.
+    :param path: full path of the directory
+    :return: tuple of the dictionary of sequence ranges made by the collapser and the list of files that were not
+    collapsed
+    """
+    scan = get_scan(path)
+    names = scan.collapsed_files
+    collapsed = scan.collapsed_list
+    files = [names[i] for i in range(0, len(names)) if not collapsed[i]]
+    return Collapser.group_sequence_ranges(names, collapsed), files
+
+
+def has_same_size(path_a, path_b, name):
+    """
+    Checks if a file has the same size in both directories.
+    :param path_a: full path of the first directory
+    :param path_b: full path of the second directory
+    :param name: name of the file
+    :return: if the sizes are the same
+    """
+    return os.path.getsize(path_a + "/" + name) == os.path.getsize(path_b + "/" + name)
+
+
+def compare_directories(path_a, path_b, check_sizes=False):
+    """
+    Compares the sequences and files in two directories.
+    :param path_a: full path of the first directory
+    :param path_b: full path of the second directory
+    :param check_sizes: if the frames found in both directories should also be checked for a different file size
+    :return: DirectoryDiff holding the results
+    """
+    sequences_a, files_a = get_sequences_and_files(path_a)
+    sequences_b, files_b = get_sequences_and_files(path_b)
+    diff = DirectoryDiff(path_a, path_b)
+
+    for sequence in sorted(set(sequences_a) | set(sequences_b)):
+        ranges_a = sequences_a.get(sequence, [])
+        ranges_b = sequences_b.get(sequence, [])
+        seq_diff = SequenceDiff(sequence, subtract_ranges(ranges_a, ranges_b), subtract_ranges(ranges_b, ranges_a),
+                                intersect_ranges(ranges_a, ranges_b))
+        if check_sizes:
+            mismatched = []
+            for start, end in seq_diff.both:
+                for frame in range(start, end + 1):
+                    if has_same_size(path_a, path_b, seq_diff.get_frame_name(frame)):
+                        continue
+                    # frames come in order, so a mismatch either extends the last range or starts a new one
+                    if mismatched and mismatched[len(mismatched) - 1][1] == frame - 1:
+                        mismatched[len(mismatched) - 1] = (mismatched[len(mismatched) - 1][0], frame)
+                    else:
+                        mismatched.append((frame, frame))
+            seq_diff.size_mismatch = mismatched
+        diff.sequences.append(seq_diff)
+
+    set_a = set(files_a)
+    set_b = set(files_b)
+    diff.only_a_files = sorted(set_a - set_b)
+    diff.only_b_files = sorted(set_b - set_a)
+    if check_sizes:
+        for name in sorted(set_a & set_b):
+            if os.path.isfile(path_a + "/" + name) and not has_same_size(path_a, path_b, name):
+                diff.size_mismatch_files.append(name)
+    return diff
+
+
+def format_report(diff, show_all=False):
+    """
+    Makes a readable report of a directory comparison, with every range written as a condensed name.
+    :param diff: DirectoryDiff to report on
+    :param show_all: if sequences without any differences should be reported too
+    :return: list of lines of the report
+    """
+    lines = ["A: " + diff.path_a, "B: " + diff.path_b]
+    for seq_diff in diff.sequences:
+        if not show_all and not seq_diff.is_different():
+            continue
+        basename, frame_padding, ext = seq_diff.sequence
+        lines.append("")
+        lines.append(basename + ".%0" + str(frame_padding) + "d." + ext)
+        for label, ranges in (("only in A", seq_diff.only_a), ("only in B", seq_diff.only_b),
+                              ("in both", seq_diff.both), ("size mismatch", seq_diff.size_mismatch)):
+            for name in seq_diff.get_condensed_names(ranges):
+                lines.append("    " + label + ": " + name)
+    for label, names in (("only in A", diff.only_a_files), ("only in B", diff.only_b_files),
+                         ("size mismatch", diff.size_mismatch_files)):
+        if names:
+            lines.append("")
+            lines.append("Files " + label + ":")
+            for name in names:
+                lines.append("    " + name)
+    return lines
+
+
+def main(args=None):
+    """
+    Runs the comparison from the command line and prints the report.
+    :param args: list of command line arguments, sys.argv is used when None
+    :return: exit status, 1 if any difference was found and 0 otherwise
+    """
+    parser = argparse.ArgumentParser(description="Compare the sequences in two directories.")
+    parser.add_argument("path_a", help="first directory, i.e. the local render")
+    parser.add_argument("path_b", help="second directory, i.e. the published copy")
+    parser.add_argument("--sizes", action="store_true", help="also report frames with different file sizes")
+    parser.add_argument("--all", action="store_true", help="also report sequences without differences")
+    options = parser.parse_args(args)
+
+    for path in (options.path_a, options.path_b):
+        if not os.path.isdir(path):
+            parser.error("not a directory: " + path)
+
+    diff = compare_directories(options.path_a, options.path_b, options.sizes)
+    for line in format_report(diff, options.all):
+        print(line)
+    if diff.only_a_files or diff.only_b_files or diff.size_mismatch_files:
+        return 1
+    for seq_diff in diff.sequences:
+        if seq_diff.is_different():
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+from bisect import bisect_left, bisect_right
+from collapser import Collapser
+
+
+class SequenceIndex:
+    """
+    This class indexes the results of the collapser so that questions about single frames can be answered without
+    collapsing or expanding anything again. Each sequence, identified by its base name, frame padding and extension,
+    maps to the sorted start and end frames of its ranges, which are searched with bisect. Every lookup takes
+    logarithmic time in the number of ranges of the sequence.
+    """
+
+    # CONSTRUCTOR ------------------------------------------------------------------------------------------------------
+
+    def __init__(self, names, collapsed):
+        """
+        Constructor builds the index from a list of collapser results.
+        :param names: the final list of names made by the collapser
+        :param collapsed: booleans indicating which of those names were collapsed
+        """
+        self.sequences = {}
+        for sequence, ranges in Collapser.group_sequence_ranges(names, collapsed).items():
+            self.sequences[sequence] = ([start for start, end in ranges], [end for start, end in ranges])
+        self.files = set(names[i] for i in range(0, len(names)) if not collapsed[i])
+
+    @staticmethod
+    def from_collapser(collapser):
+        """
+        Builds the index from the current results of a collapser.
+        :param collapser: the Collapser
+        :return: the SequenceIndex
+        """
+        return SequenceIndex(collapser.get_result_files(), collapser.get_collapsed_list())
+
+    # GETTERS & SETTERS ------------------------------------------------------------------------------------------------
+
+    def get_sequences(self):
+        """
+        This method gets every sequence in the index.
+        :return: sorted list of (basename, frame_padding, extension) tuples
+        """
+        return sorted(self.sequences)
+
+    def get_ranges(self, sequence):
+        """
+        This method gets the ranges of a sequence.
+        :param sequence: tuple of (basename, frame_padding, extension)
+        :return: sorted list of (start, end) ranges, empty if the sequence is not in the index
+        """
+        starts, ends = self.sequences.get(sequence, ([], []))
+        return list(zip(starts, ends))
+
+    # METHODS ----------------------------------------------------------------------------------------------------------
+
+    @staticmethod
+    def split_filename(filename):
+        """
+        Splits the name of a single frame into its sequence and frame number.
+        For example, hello_world.002.jpg gives (("hello_world", 3, "jpg"), 2).
+        :param filename: name of the file
+        :return: tuple of the sequence and the frame number, or None if the file isn't a frame of a sequence
+        """
+        if not Collapser.should_condense(filename):
+            return None
+        file_parts = filename.split('.')
+        sequence = (Collapser.get_name(file_parts), Collapser.get_buffer(file_parts), file_parts[len(file_parts) - 1])
+        return sequence, Collapser.get_iteration(file_parts)
+
+    def find_range(self, sequence, frame):
+        """
+        Finds the range of a sequence that holds a frame.
+        :param sequence: tuple of (basename, frame_padding, extension)
+        :param frame: the frame number
+        :return: the (start, end) range, or None if the frame doesn't exist
+        """
+        if sequence not in self.sequences:
+            return None
+        starts, ends = self.sequences[sequence]
+        # the only range that can hold the frame is the last one starting at or before it
+        i = bisect_right(starts, frame) - 1
+        if i >= 0 and ends[i] >= frame:
+            return starts[i], ends[i]
+        return None
+
+    def find_sequence(self, filename):
+        """
+        Maps a file name back to the entry it was collapsed into.
+        :param filename: name of the file, i.e. hello_world.002.jpg
+        :return: the condensed name of the entry holding the frame, the file name itself for a file that was not
+        collapsed, or None if the file is not in the index
+        """
+        split = SequenceIndex.split_filename(filename)
+        if split is not None:
+            sequence, frame = split
+            frame_range = self.find_range(sequence, frame)
+            if frame_range is not None:
+                basename, frame_padding, ext = sequence
+                return Collapser.get_condensed_filename(basename, frame_padding, ext, frame_range[0], frame_range[1])
+        if filename in self.files:
+            return filename
+        return None
+
+    def has_frame(self, sequence, frame):
+        """
+        Indicates if a frame of a sequence exists.
+        :param sequence: tuple of (basename, frame_padding, extension)
+        :param frame: the frame number
+        :return: if the frame exists
+        """
+        return self.find_range(sequence, frame) is not None
+
+    def frames_in(self, sequence, start, end):
+        """
+        Finds the frames of a sequence between two frame numbers.
+        :param sequence: tuple of (basename, frame_padding, extension)
+        :param start: first frame to look for
+        :param end: last frame to look for
+        :return: sorted list of (start, end) ranges of the frames that exist, cut to the frames asked for
+        """
+        if sequence not in self.sequences or end < start:
+            return []
+        starts, ends = self.sequences[sequence]
+        # the first range that can overlap is the first one ending at or after the start
+        first = bisect_left(ends, start)
+        last = bisect_right(starts, end)
+        return [(max(starts[i], start), min(ends[i], end)) for i in range(first, last)]
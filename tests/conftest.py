@@ -0,0 +1,19 @@
+import os
+import sys
+import pytest
+
+# The modules of the file selector live in the project root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def plates_folder(tmp_path):
+    """
+    Makes tmp_path/shot/plates holding the frames plate.0001.exr to plate.0003.exr.
+    :return: full path of the plates folder
+    """
+    folder = os.path.join(str(tmp_path), "shot", "plates")
+    os.makedirs(folder)
+    for frame in range(1, 4):
+        open(os.path.join(folder, "plate." + str(frame).zfill(4) + ".exr"), "w").close()
+    return folder
@@ -0,0 +1,115 @@
+import random
+import pytest
+from collapser import Collapser
+from funcs import intersect_ranges, subtract_ranges, union_ranges, count_frames
+
+
+def collapse(entries):
+    collapser = Collapser(processes=1)
+    collapser.make_final_list(entries)
+    return collapser.get_result_files(), collapser.get_collapsed_list()
+
+
+def test_run_at_end_keeps_last_frame():
+    assert collapse(["a.001.jpg", "a.002.jpg", "a.003.jpg"]) == (["a.%03d.jpg 1-3"], [True])
+
+
+def test_run_after_uncollapsible_entry_keeps_its_name():
+    assert collapse(["README", "a.001.jpg", "a.002.jpg"]) == (["README", "a.%03d.jpg 1-2"], [False, True])
+
+
+def test_same_name_without_frame_number_ends_run():
+    assert collapse(["x.0001.exr", "x.notes.txt"]) == (["x.%04d.exr 1-1", "x.notes.txt"], [True, False])
+
+
+def test_different_extension_or_padding_is_a_different_sequence():
+    res, condensed = collapse(["a.001.exr", "a.001.jpg", "a.002.exr", "a.002.jpg"])
+    assert res == ["a.%03d.exr 1-1", "a.%03d.jpg 1-1", "a.%03d.exr 2-2", "a.%03d.jpg 2-2"]
+    res, condensed = collapse(["a.09.jpg", "a.010.jpg"])
+    assert res == ["a.%02d.jpg 9-9", "a.%03d.jpg 10-10"]
+
+
+def test_gaps_and_files_between_sequences():
+    res, condensed = collapse(["a.001.jpg", "a.003.jpg", "b.txt", "c.01.png", "c.02.png"])
+    assert res == ["a.%03d.jpg 1-1", "a.%03d.jpg 3-3", "b.txt", "c.%02d.png 1-2"]
+    assert condensed == [True, True, False, True]
+
+
+def test_parse_condensed_round_trip():
+    name = Collapser.get_condensed_filename("a b.c", 3, "jpg", -3, -1)
+    assert Collapser.parse_condensed(name) == ("a b.c", 3, "jpg", -3, -1)
+
+
+def test_get_sequence_ranges():
+    collapser = Collapser(processes=1)
+    collapser.make_final_list(["README", "a.001.jpg", "a.002.jpg", "a.005.jpg"])
+    assert collapser.get_sequence_ranges() == {("a", 3, "jpg"): [(1, 2), (5, 5)]}
+
+
+def random_ranges(rng):
+    frames = sorted(rng.sample(range(0, 60), rng.randint(0, 30)))
+    ranges = []
+    for frame in frames:
+        if ranges and ranges[-1][1] == frame - 1:
+            ranges[-1] = (ranges[-1][0], frame)
+        else:
+            ranges.append((frame, frame))
+    return ranges
+
+
+def to_set(ranges):
+    frames = set()
+    for start, end in ranges:
+        frames.update(range(start, end + 1))
+    return frames
+
+
+def test_range_helpers_match_set_arithmetic():
+    rng = random.Random(0)
+    for i in range(500):
+        ranges1 = random_ranges(rng)
+        ranges2 = random_ranges(rng)
+        assert to_set(intersect_ranges(ranges1, ranges2)) == to_set(ranges1) & to_set(ranges2)
+        assert to_set(subtract_ranges(ranges1, ranges2)) == to_set(ranges1) - to_set(ranges2)
+        union = union_ranges(ranges1, ranges2)
+        assert to_set(union) == to_set(ranges1) | to_set(ranges2)
+        # merged ranges never touch or overlap
+        assert all(union[j][1] + 1 < union[j + 1][0] for j in range(0, len(union) - 1))
+        assert count_frames(ranges1) == len(to_set(ranges1))
+
+
+def random_entries(rng, count):
+    names = ["a", "a.b", "c_d", "e"]
+    entries = set()
+    while len(entries) < count:
+        name = rng.choice(names)
+        if rng.random() < 0.1:
+            entries.add(name + ".notes.txt" if rng.random() < 0.5 else name + "_" + str(rng.randint(0, 9)))
+        else:
+            frame = str(rng.randint(0, 60)).zfill(rng.choice([2, 3, 4]))
+            entries.add(name + "." + frame + "." + rng.choice(["exr", "jpg"]))
+    return sorted(entries)
+
+
+def test_parallel_collapse_matches_single_core(monkeypatch):
+    import collapser as collapser_module
+    rng = random.Random(29)
+    monkeypatch.setattr(collapser_module, "numpy", None)
+    monkeypatch.setattr(collapser_module, "PARALLEL_THRESHOLD", 0)
+    monkeypatch.setattr(collapser_module, "PARALLEL_CHUNK_SIZE", 7)
+    for attempt in range(0, 20):
+        entries = random_entries(rng, rng.randint(1, 200))
+        parallel = Collapser(processes=2)
+        parallel.make_final_list(entries)
+        assert (parallel.get_result_files(), parallel.get_collapsed_list()) == collapse(entries)
+
+
+def test_numpy_collapse_matches_python():
+    pytest.importorskip("numpy")
+    rng = random.Random(30)
+    for attempt in range(0, 20):
+        entries = random_entries(rng, rng.randint(1, 200))
+        res = []
+        condensed = []
+        Collapser.collapse_entries_numpy(entries, res, condensed)
+        assert (res, condensed) == collapse(entries)
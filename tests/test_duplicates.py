@@ -0,0 +1,68 @@
+import os
+from multiprocessing.pool import ThreadPool
+from duplicates import HashCache, find_duplicate_runs, find_selection_duplicates
+
+
+def write_frames(folder, contents):
+    for frame, content in enumerate(contents, 1):
+        with open(os.path.join(folder, "plate." + str(frame).zfill(4) + ".exr"), "wb") as f:
+            f.write(content)
+
+
+def test_duplicate_runs(tmp_path):
+    write_frames(str(tmp_path), [b"a", b"b", b"b", b"b", b"c", b"d", b"d"])
+    pool = ThreadPool(2)
+    try:
+        runs = find_duplicate_runs(str(tmp_path), ("plate", 4, "exr"), [(1, 7)], HashCache(), pool)
+    finally:
+        pool.close()
+        pool.join()
+    assert runs == [(2, 4), (6, 7)]
+
+
+def test_cache_keeps_most_recently_used_hashes(tmp_path):
+    write_frames(str(tmp_path), [b"a", b"b", b"c"])
+    paths = [os.path.join(str(tmp_path), "plate." + str(frame).zfill(4) + ".exr") for frame in range(1, 4)]
+    cache = HashCache(max_entries=2)
+    cache.get_digest(paths[0])
+    cache.get_digest(paths[1])
+    cache.get_digest(paths[0])
+    cache.get_digest(paths[2])
+    assert len(cache.hashes) == 3
+    cache.trim()
+    assert list(cache.hashes) == [paths[0], paths[2]]
+
+
+def test_load_drops_missing_files(tmp_path):
+    write_frames(str(tmp_path), [b"a", b"b"])
+    paths = [os.path.join(str(tmp_path), "plate." + str(frame).zfill(4) + ".exr") for frame in range(1, 3)]
+    filename = os.path.join(str(tmp_path), "hashes.json")
+    cache = HashCache()
+    for path in paths:
+        cache.get_digest(path)
+    cache.save(filename)
+    os.remove(paths[0])
+
+    loaded = HashCache()
+    loaded.load(filename)
+    assert list(loaded.hashes) == [paths[1]]
+    assert loaded.hashes[paths[1]] == cache.hashes[paths[1]]
+
+
+def test_check_larger_than_cache_is_not_hashed_again(tmp_path, monkeypatch):
+    import duplicates
+    from selection import Selection
+    write_frames(str(tmp_path), [b"a", b"b", b"b", b"c", b"d", b"d"])
+    selection = Selection(["plate.%04d.exr 1-6"], [True])
+    selection.select_all()
+    cache = HashCache(max_entries=3)
+    hashed = []
+    original = duplicates.hash_file
+    monkeypatch.setattr(duplicates, "hash_file", lambda path: hashed.append(path) or original(path))
+
+    first = find_selection_duplicates(str(tmp_path), selection, cache, workers=2)
+    assert len(hashed) == 6
+    del hashed[:]
+    assert find_selection_duplicates(str(tmp_path), selection, cache, workers=2) == first
+    assert hashed == []
+    assert first == {("plate", 4, "exr"): [(2, 3), (5, 6)]}
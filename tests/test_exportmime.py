@@ -0,0 +1,76 @@
+import os
+import pytest
+
+pytest.importorskip("PySide2")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide2 import QtCore, QtGui
+from PySide2.QtTest import QTest
+from PySide2.QtWidgets import QApplication, QAbstractItemView, QTreeWidget, QTreeWidgetItem
+from exportmime import DragStarter, SelectionMimeData, URI_MIME
+
+
+@pytest.fixture
+def tree():
+    app = QApplication.instance() or QApplication([])
+    tree = QTreeWidget()
+    tree.setSelectionMode(QAbstractItemView.MultiSelection)
+    for name in ("a.%04d.exr 1-3", "b.txt", "c.txt"):
+        tree.addTopLevelItem(QTreeWidgetItem([name]))
+    tree.resize(300, 200)
+    tree.show()
+    QTest.qWaitForWindowExposed(tree)
+    yield tree
+    tree.close()
+
+
+def item_center(tree, row):
+    return tree.visualItemRect(tree.topLevelItem(row)).center()
+
+
+def drag_move(tree, pos):
+    # QTest.mouseMove doesn't say which buttons are held, so the move is sent by hand
+    event = QtGui.QMouseEvent(QtCore.QEvent.MouseMove, QtCore.QPointF(pos), QtCore.Qt.NoButton,
+                              QtCore.Qt.LeftButton, QtCore.Qt.NoModifier)
+    QApplication.sendEvent(tree.viewport(), event)
+
+
+def test_drag_keeps_item_under_cursor_selected(tree):
+    exported = []
+
+    def get_export():
+        exported.append([item.text(0) for item in tree.selectedItems()])
+        return "/shots", []
+
+    starter = DragStarter(tree, get_export)
+    tree.topLevelItem(0).setSelected(True)
+    tree.topLevelItem(1).setSelected(True)
+    start = item_center(tree, 0)
+    QTest.mousePress(tree.viewport(), QtCore.Qt.LeftButton, QtCore.Qt.NoModifier, start)
+    assert tree.topLevelItem(0).isSelected()
+    end = start + QtCore.QPoint(QApplication.startDragDistance() + 5, 0)
+    drag_move(tree, end)
+    QTest.mouseRelease(tree.viewport(), QtCore.Qt.LeftButton, QtCore.Qt.NoModifier, end)
+    assert exported == [["a.%04d.exr 1-3", "b.txt"]]
+    assert tree.topLevelItem(0).isSelected()
+
+
+def test_click_still_toggles_selection(tree):
+    starter = DragStarter(tree, lambda: ("/shots", []))
+    QTest.mouseClick(tree.viewport(), QtCore.Qt.LeftButton, QtCore.Qt.NoModifier, item_center(tree, 2))
+    assert tree.topLevelItem(2).isSelected()
+    QTest.mouseClick(tree.viewport(), QtCore.Qt.LeftButton, QtCore.Qt.NoModifier, item_center(tree, 2))
+    assert not tree.topLevelItem(2).isSelected()
+
+
+def test_uri_list_expands_sequences(tree):
+    data = SelectionMimeData("/shots", [("a.%04d.exr 1-2", True), ("b.txt", False)])
+    assert data.text() == "/shots/a.%04d.exr 1-2\n/shots/b.txt"
+    assert [url.toLocalFile() for url in data.urls()] == ["/shots/a.0001.exr", "/shots/a.0002.exr", "/shots/b.txt"]
+    assert data.hasFormat(URI_MIME)
+
+
+def test_uri_list_reads_names_with_spaces(tree):
+    data = SelectionMimeData("/s", [("my shot.%04d.exr 1-2", True), ("my notes.txt", False)])
+    assert [url.toLocalFile() for url in data.urls()] == ["/s/my shot.0001.exr", "/s/my shot.0002.exr",
+                                                          "/s/my notes.txt"]
@@ -0,0 +1,77 @@
+import os
+import time
+import pytest
+
+pytest.importorskip("PySide2")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide2 import QtGui
+from PySide2.QtWidgets import QApplication
+import flipbook
+from flipbook import FrameCache, FlipbookWindow
+
+
+@pytest.fixture
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def make_image(width=10, height=10):
+    image = QtGui.QImage(width, height, QtGui.QImage.Format_RGB32)
+    image.fill(QtGui.QColor(255, 0, 0))
+    return image
+
+
+def make_sequence(root, frames):
+    for frame in range(1, frames + 1):
+        make_image(64, 36).save(os.path.join(root, "plate." + str(frame).zfill(4) + ".png"))
+    return "plate.%04d.png 1-" + str(frames)
+
+
+def wait(app, seconds):
+    end = time.time() + seconds
+    while time.time() < end:
+        app.processEvents()
+        time.sleep(0.002)
+
+
+def test_cache_budget_covers_every_owner(app):
+    frame_bytes = make_image().sizeInBytes()
+    cache = FrameCache(frame_bytes * 3)
+    for key in ((0, 0), (1, 0), (0, 1), (1, 1)):
+        cache.put(key, make_image())
+    assert list(cache.frames) == [(1, 0), (0, 1), (1, 1)]
+    cache.remove_all(1)
+    assert list(cache.frames) == [(0, 1)]
+    assert cache.bytes == frame_bytes
+
+
+def test_windows_share_the_cache_and_count_scrub_misses(app, tmp_path):
+    name = make_sequence(str(tmp_path), 12)
+    first = FlipbookWindow(str(tmp_path), name)
+    second = FlipbookWindow(str(tmp_path), name)
+    cache = flipbook.get_shared_cache()
+    try:
+        assert first.loader.cache is second.loader.cache is cache
+        assert cache.get_share() == cache.max_bytes // cache.users
+        second.slider.setValue(9)
+        assert second.scrub_misses == 1
+        wait(app, 0.5)
+        assert cache.contains((second.loader.key, 9))
+    finally:
+        first.reject()
+        second.reject()
+    assert not any(key[0] in (first.loader.key, second.loader.key) for key in cache.frames)
+
+
+def test_closed_window_is_deleted(app, tmp_path):
+    from PySide2 import QtCore
+    from PySide2.QtWidgets import QWidget
+    parent = QWidget()
+    name = make_sequence(str(tmp_path), 3)
+    window = FlipbookWindow(str(tmp_path), name, parent)
+    window.show()
+    window.reject()
+    QApplication.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+    assert parent.findChildren(FlipbookWindow) == []
+    parent.deleteLater()
@@ -0,0 +1,28 @@
+import os
+import pytest
+
+pytest.importorskip("PySide2")
+
+from pathcompleter import DirectoryIndex
+
+
+def make_folders(root, names):
+    for name in names:
+        os.mkdir(os.path.join(str(root), name))
+
+
+def test_completions_keep_the_typed_prefix(tmp_path, monkeypatch):
+    make_folders(tmp_path, ["shots", "show", "assets"])
+    monkeypatch.setenv("HOME", str(tmp_path))
+    index = DirectoryIndex()
+    assert index.complete("~/sh", "/") == ["~/shots", "~/show"]
+    assert index.complete(str(tmp_path) + "/a", "/") == [str(tmp_path) + "/assets"]
+
+
+def test_relative_text_completes_against_the_base_path(tmp_path):
+    make_folders(tmp_path, ["shots", "assets"])
+    make_folders(tmp_path / "shots", ["sh010", "sh020"])
+    index = DirectoryIndex()
+    assert index.complete("sh", str(tmp_path)) == ["shots"]
+    assert index.complete("shots/sh01", str(tmp_path)) == ["shots/sh010"]
+    assert index.complete("../" + tmp_path.name + "/as", str(tmp_path)) == ["../" + tmp_path.name + "/assets"]
@@ -0,0 +1,36 @@
+import os
+import time
+import threading
+from prefetcher import Prefetcher
+
+
+def wait_for(prefetcher, path, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        scan = prefetcher.take(path)
+        if scan is not None:
+            return scan
+        time.sleep(0.01)
+    return None
+
+
+def test_prefetched_scan_is_collapsed(plates_folder):
+    folder = os.path.dirname(plates_folder)
+    prefetcher = Prefetcher()
+    prefetcher.prefetch(folder, ["plates"])
+    scan = wait_for(prefetcher, os.path.join(folder, "plates"))
+    assert scan.collapsed_files == ["plate.%04d.exr 1-3"]
+    assert scan.folder_list == [False]
+
+
+def test_requeued_after_leaving_and_coming_back(tmp_path, plates_folder):
+    folder = os.path.dirname(plates_folder)
+    prefetcher = Prefetcher(workers=1)
+    # keeps the only worker busy so the first job is still pending when the user navigates
+    blocker = threading.Event()
+    prefetcher.pool.apply_async(blocker.wait)
+    prefetcher.prefetch(folder, ["plates"])
+    prefetcher.prefetch(str(tmp_path), ["shot"])
+    prefetcher.prefetch(folder, ["plates"])
+    blocker.set()
+    assert wait_for(prefetcher, os.path.join(folder, "plates")) is not None
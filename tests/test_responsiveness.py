@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip("PySide2")
+
+import responsiveness
+from PySide2.QtWidgets import QApplication
+from main import MainWindow
+
+
+def test_harness_stays_within_budget():
+    results = responsiveness.run_harness(sequences=5, frames=100, folders=3)
+    assert results
+    assert responsiveness.failed(results) == []
+    assert responsiveness.over_budget(results, 1000) == []
+
+
+def test_failing_action_is_recorded():
+    app = QApplication.instance() or QApplication([])
+    window = MainWindow(app)
+    monitor = responsiveness.StallMonitor(window)
+
+    def action():
+        raise RuntimeError("broken action")
+
+    result = monitor.measure("broken", action)
+    window.close()
+    assert "RuntimeError: broken action" in result.error
+    assert responsiveness.failed([result]) == [result]
@@ -0,0 +1,97 @@
+import os
+import time
+import socket
+import threading
+import pytest
+import scanservice
+from scanservice import ScanServer, ScanService, request_scan, get_scan, make_socket_dir
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix domain sockets")
+
+
+def test_scan_through_service(tmp_path, plates_folder):
+    folder = plates_folder
+    socket_path = os.path.join(str(tmp_path), "run", "scan.sock")
+    make_socket_dir(socket_path)
+    server = ScanServer(socket_path, ScanService())
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        assert os.stat(socket_path).st_mode & 0o077 == 0
+        scan = request_scan(folder, socket_path)
+        assert scan.collapsed_files == ["plate.%04d.exr 1-3"]
+        assert scan.files is None
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_slow_service_falls_back_to_in_process_scan(tmp_path, plates_folder, monkeypatch):
+    folder = plates_folder
+    socket_path = os.path.join(str(tmp_path), "scan.sock")
+    # a socket that accepts connections but never answers
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(1)
+    monkeypatch.setenv("FILE_SELECTOR_SOCKET", socket_path)
+    try:
+        started = time.time()
+        scan = get_scan(folder, timeout=0.2)
+        assert time.time() - started < 2
+        assert scan.collapsed_files == ["plate.%04d.exr 1-3"]
+        assert scan.files == ["plate.0001.exr", "plate.0002.exr", "plate.0003.exr"]
+    finally:
+        listener.close()
+
+
+def test_socket_of_another_user_is_not_used(tmp_path, monkeypatch):
+    socket_path = os.path.join(str(tmp_path), "scan.sock")
+    open(socket_path, "w").close()
+    monkeypatch.setattr(scanservice.os, "getuid", lambda: os.stat(socket_path).st_uid + 1)
+    assert request_scan(str(tmp_path), socket_path) is None
+
+
+def test_shared_socket_directory_is_refused(tmp_path):
+    directory = os.path.join(str(tmp_path), "shared")
+    os.mkdir(directory)
+    os.chmod(directory, 0o777)
+    with pytest.raises(RuntimeError):
+        make_socket_dir(os.path.join(directory, "scan.sock"))
+
+
+def test_path_locks_are_released(tmp_path, plates_folder):
+    service = ScanService(cache_size=1)
+    with pytest.raises(OSError):
+        service.get_scan(os.path.join(str(tmp_path), "missing"))
+    service.get_scan(plates_folder)
+    service.get_scan(os.path.dirname(plates_folder))
+    assert service.path_locks == {}
+    assert list(service.cache) == [os.path.dirname(plates_folder)]
+
+
+def test_concurrent_requests_scan_once(plates_folder, monkeypatch):
+    service = ScanService()
+    scanned = []
+    started = threading.Event()
+    release = threading.Event()
+    scan_directory = scanservice.scan_directory
+
+    def slow_scan(path, collapser=None):
+        scanned.append(path)
+        started.set()
+        release.wait(5)
+        return scan_directory(path, collapser)
+
+    monkeypatch.setattr(scanservice, "scan_directory", slow_scan)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.get_scan(plates_folder))) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert scanned == [plates_folder]
+    assert len(results) == 3 and results[0] is results[1] is results[2]
+    assert service.path_locks == {}
@@ -0,0 +1,99 @@
+from selection import Selection
+
+NAMES = ["a.%04d.exr 1-10", "a.%04d.exr 12-20", "b.%02d.jpg 1-5", "notes.txt"]
+COLLAPSED = [True, True, True, False]
+A = ("a", 4, "exr")
+B = ("b", 2, "jpg")
+
+
+def make_selection():
+    return Selection(NAMES, COLLAPSED)
+
+
+def make_full_selection():
+    selection = make_selection()
+    for i in range(0, len(NAMES)):
+        selection.select_name(NAMES[i], COLLAPSED[i])
+    return selection
+
+
+def test_universe_merges_touching_ranges():
+    selection = Selection(["a.%04d.exr 1-2", "a.%04d.exr 3-4", "a.%04d.exr 6-6"], [True, True, True])
+    selection.select_all()
+    assert selection.get_sequence_ranges() == {A: [(1, 4), (6, 6)]}
+    assert selection.count_frames() == 5
+
+
+def test_select_all_then_deselect_frames():
+    selection = make_selection()
+    selection.select_all()
+    assert selection.everything
+    selection.deselect_frames(A, 5, 14)
+    assert not selection.everything
+    assert selection.get_sequence_ranges() == {A: [(1, 4), (15, 20)], B: [(1, 5)]}
+    assert selection.get_files() == {"notes.txt"}
+    selection.deselect_frames(B, 1, 5)
+    assert B not in selection.get_sequence_ranges()
+    # the listing itself is unchanged
+    assert selection.get_universe()[0][A] == [(1, 10), (12, 20)]
+
+
+def test_union_with_everything_on_either_side():
+    everything = make_selection()
+    everything.select_all()
+    part = make_selection()
+    part.select_frames(A, 2, 3)
+    assert everything.union(part).everything
+    assert part.union(everything).everything
+    other = make_selection()
+    other.select_frames(A, 4, 6)
+    other.select_name("notes.txt", False)
+    both = part.union(other)
+    assert both.get_sequence_ranges() == {A: [(2, 6)]}
+    assert both.get_files() == {"notes.txt"}
+
+
+def test_difference_with_everything_on_either_side():
+    everything = make_selection()
+    everything.select_all()
+    part = make_selection()
+    part.select_frames(A, 2, 3)
+    part.select_name("notes.txt", False)
+    assert part.difference(everything).is_empty()
+    rest = everything.difference(part)
+    assert rest.get_sequence_ranges() == {A: [(1, 1), (4, 10), (12, 20)], B: [(1, 5)]}
+    assert rest.get_files() == set()
+    assert everything.difference(make_selection()) == everything
+
+
+def test_everything_equals_explicit_full_selection():
+    everything = make_selection()
+    everything.select_all()
+    full = make_full_selection()
+    assert everything == full
+    assert full == everything
+    full.deselect_frames(B, 5, 5)
+    assert everything != full
+    assert make_selection() != everything
+
+
+def test_make_explicit_copies_the_universe():
+    selection = make_selection()
+    selection.select_all()
+    selection.make_explicit()
+    selection.deselect_frames(A, 1, 1)
+    assert selection.get_universe()[0][A] == [(1, 10), (12, 20)]
+    assert selection.get_sequence_ranges()[A] == [(2, 10), (12, 20)]
+
+
+def test_condensed_names_of_sub_ranges():
+    selection = make_selection()
+    selection.select_frames(A, 3, 4)
+    selection.select_frames(A, 8, 10)
+    selection.select_frames(A, 12, 13)
+    selection.select_frames(B, 2, 2)
+    selection.select_name("notes.txt", False)
+    # the names are sorted as text
+    assert selection.get_condensed_names() == [("a.%04d.exr 12-13", True), ("a.%04d.exr 3-4", True),
+                                               ("a.%04d.exr 8-10", True), ("b.%02d.jpg 2-2", True),
+                                               ("notes.txt", False)]
@@ -0,0 +1,71 @@
+import os
+import seqcompare
+from seqcompare import compare_directories, format_report
+
+PLATE = ("plate", 4, "exr")
+
+
+def write(folder, names, content=b""):
+    for name in names:
+        with open(os.path.join(folder, name), "wb") as f:
+            f.write(content)
+
+
+def frames(start, end):
+    return ["plate." + str(frame).zfill(4) + ".exr" for frame in range(start, end + 1)]
+
+
+def make_pair(tmp_path):
+    path_a = str(tmp_path / "a")
+    path_b = str(tmp_path / "b")
+    os.mkdir(path_a)
+    os.mkdir(path_b)
+    # A has 1-10, B has 4-12, and frames 6-7 have a different size in B
+    write(path_a, frames(1, 10), b"x")
+    write(path_b, frames(4, 12), b"x")
+    write(path_b, frames(6, 7), b"xx")
+    write(path_a, ["notes.txt"])
+    write(path_b, ["publish.log"])
+    return path_a, path_b
+
+
+def test_sequence_ranges(tmp_path):
+    path_a, path_b = make_pair(tmp_path)
+    diff = compare_directories(path_a, path_b, check_sizes=True)
+    assert len(diff.sequences) == 1
+    seq_diff = diff.sequences[0]
+    assert seq_diff.sequence == PLATE
+    assert seq_diff.only_a == [(1, 3)]
+    assert seq_diff.only_b == [(11, 12)]
+    assert seq_diff.both == [(4, 10)]
+    assert seq_diff.size_mismatch == [(6, 7)]
+    assert diff.only_a_files == ["notes.txt"]
+    assert diff.only_b_files == ["publish.log"]
+
+
+def test_sizes_are_only_checked_when_asked(tmp_path):
+    path_a, path_b = make_pair(tmp_path)
+    diff = compare_directories(path_a, path_b)
+    assert diff.sequences[0].size_mismatch == []
+
+
+def test_report_uses_condensed_names(tmp_path):
+    path_a, path_b = make_pair(tmp_path)
+    lines = format_report(compare_directories(path_a, path_b, check_sizes=True))
+    assert "    only in A: plate.%04d.exr 1-3" in lines
+    assert "    only in B: plate.%04d.exr 11-12" in lines
+    assert "    size mismatch: plate.%04d.exr 6-7" in lines
+    assert "    notes.txt" in lines
+
+
+def test_main_exit_status(tmp_path, capsys):
+    path_a, path_b = make_pair(tmp_path)
+    assert seqcompare.main([path_a, path_b]) == 1
+    path_c = str(tmp_path / "c")
+    os.mkdir(path_c)
+    write(path_c, frames(1, 10), b"x")
+    write(path_c, ["notes.txt"])
+    assert seqcompare.main(["--sizes", path_a, path_c]) == 0
+    write(path_c, frames(3, 3), b"xyz")
+    assert seqcompare.main([path_a, path_c]) == 0
+    assert seqcompare.main(["--sizes", path_a, path_c]) == 1
@@ -0,0 +1,32 @@
+from collapser import Collapser
+from seqindex import SequenceIndex
+
+
+def make_index(entries):
+    collapser = Collapser(processes=1)
+    collapser.make_final_list(sorted(entries))
+    return SequenceIndex.from_collapser(collapser)
+
+
+def test_find_sequence():
+    index = make_index(["a.0001.exr", "a.0002.exr", "a.0004.exr", "notes.txt"])
+    assert index.find_sequence("a.0002.exr") == "a.%04d.exr 1-2"
+    assert index.find_sequence("a.0004.exr") == "a.%04d.exr 4-4"
+    assert index.find_sequence("a.0003.exr") is None
+    assert index.find_sequence("notes.txt") == "notes.txt"
+
+
+def test_names_without_integer_frames_are_not_frames():
+    index = make_index(["a.inf.exr", "a.1e3.exr", "a.1.5.exr", "a.0001.exr"])
+    assert SequenceIndex.split_filename("a.inf.exr") is None
+    assert SequenceIndex.split_filename("a.1e3.exr") is None
+    assert SequenceIndex.split_filename("a.-3.exr") == (("a", 2, "exr"), -3)
+    assert index.find_sequence("a.inf.exr") == "a.inf.exr"
+    assert index.find_sequence("a.1e3.exr") == "a.1e3.exr"
+
+
+def test_frames_in():
+    index = make_index(["a.0001.exr", "a.0002.exr", "a.0005.exr", "a.0006.exr", "a.0009.exr"])
+    assert index.frames_in(("a", 4, "exr"), 2, 8) == [(2, 2), (5, 6)]
+    assert index.has_frame(("a", 4, "exr"), 9)
+    assert not index.has_frame(("a", 4, "exr"), 3)